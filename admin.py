@@ -1,7 +1,107 @@
-from flask import request, redirect, url_for, flash, render_template_string
+from collections import namedtuple
+from flask import current_app, request, redirect, url_for, flash, render_template_string
 from flask_login import login_required, current_user
-from models import db, Flag, Post, Comment
+from sqlalchemy import func, and_, or_, exists, select, update
+from sqlalchemy.orm import joinedload, aliased
+from models import db, Flag, Post, PostStats, Comment, Vote, Notification, Subscription, UserStats, TimelineEntry
 from templates import ADMIN_TEMPLATE
+from moderation import flag_target, flag_total, clear_flags
+import feed_cache
+import suggest
+
+# One moderation-queue row: the flagged target, how often it was flagged, and its flags (reporters eager-loaded)
+QueueItem = namedtuple('QueueItem', ['target', 'flag_count', 'flags'])
+
+def _parse_cursor(raw):
+    """Parse a 'count.id' keyset cursor; returns None if missing or malformed."""
+    try:
+        flag_count, target_id = raw.split('.', 1)
+        return int(flag_count), int(target_id)
+    except (AttributeError, ValueError):
+        return None
+
+def _flag_queue(model, fk_column, cursor, page_size):
+    """One keyset page of flagged targets, most-flagged first, as (items, next_cursor)."""
+    flag_count = flag_total()
+    q = db.session.query(fk_column, flag_count).filter(fk_column.isnot(None)).group_by(fk_column)
+    if cursor:
+        last_count, last_id = cursor
+        q = q.having(or_(flag_count < last_count, and_(flag_count == last_count, fk_column < last_id)))
+    rows = q.order_by(flag_count.desc(), fk_column.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = f'{rows[-1][1]}.{rows[-1][0]}'
+    if not rows:
+        return [], None
+
+    ids = [target_id for target_id, _ in rows]
+    targets = {t.id: t for t in model.query.options(joinedload(model.user)).filter(model.id.in_(ids))}
+    flags_by_target = {target_id: [] for target_id in ids}
+    # Only the newest few flags per target: a flag-bombed post must not load thousands of rows (totals come from rows)
+    newest = select(Flag.id, func.row_number().over(partition_by=fk_column, order_by=(Flag.timestamp.desc(), Flag.id.desc()))
+                    .label('n')).where(fk_column.in_(ids)).subquery()
+    shown = (Flag.query.options(joinedload(Flag.user)).join(newest, newest.c.id == Flag.id)
+             .filter(newest.c.n <= current_app.config['ADMIN_FLAGS_PER_TARGET']).order_by(Flag.timestamp.desc()))
+    for flag in shown:
+        flags_by_target[getattr(flag, fk_column.key)].append(flag)
+    items = [QueueItem(targets[target_id], count, flags_by_target[target_id])
+             for target_id, count in rows if target_id in targets]
+    return items, next_cursor
+
+def _delete_comments(comment_ids):
+    """Bulk-delete comments with their reply subtrees and referencing rows, then resync counters (caller commits)."""
+    if not comment_ids:
+        return
+    roots = db.session.execute(select(Comment.post_id, Comment.parent_id, Comment.path).where(Comment.id.in_(comment_ids))).all()
+    if not roots:
+        return
+    subtrees = or_(*[and_(Comment.post_id == post_id, Comment.path >= path, Comment.path < Comment.subtree_end(path))
+                     for post_id, _, path in roots])
+    rows = db.session.execute(select(Comment.id, Comment.user_id).where(subtrees)).all()
+    comment_ids = [cid for cid, _ in rows]
+    # A notification coalesces several comments but points at the newest: repoint it at the newest comment left on
+    # its post, and drop it only when none is left
+    surviving = select(Comment.id).where(Comment.post_id == Notification.post_id, Comment.id.not_in(comment_ids))
+    stale = Notification.comment_id.in_(comment_ids)
+    Notification.query.filter(stale, ~exists(surviving)).delete(synchronize_session=False)
+    db.session.execute(update(Notification).where(stale).values(
+        comment_id=surviving.with_only_columns(func.max(Comment.id)).scalar_subquery()))
+    Flag.query.filter(Flag.comment_id.in_(comment_ids)).delete(synchronize_session=False)
+    Comment.query.filter(Comment.id.in_(comment_ids)).delete(synchronize_session=False)
+
+    # Query deletes skip the ORM events, so recount what the removed subtrees touched
+    UserStats.recount({user_id for _, user_id in rows})
+    post_ids = {post_id for post_id, _, _ in roots}
+    parent_ids = {parent_id for _, parent_id, _ in roots if parent_id}
+    db.session.execute(update(Post).where(Post.id.in_(post_ids)).values(
+        comment_count=select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()))
+    if parent_ids:
+        reply = aliased(Comment)
+        db.session.execute(update(Comment).where(Comment.id.in_(parent_ids)).values(
+            reply_count=select(func.count(reply.id)).where(reply.parent_id == Comment.id).scalar_subquery()))
+
+def _delete_posts(post_ids):
+    """Bulk-delete posts with their comments, votes, flags, notifications, subscriptions and timeline entries (caller commits)."""
+    if not post_ids:
+        return
+    # Authors lose posts and karma, commenters lose comments; query deletes skip the ORM events, so recount after
+    posts = db.session.execute(select(Post.id, Post.category_id, Post.user_id, Post.title).where(Post.id.in_(post_ids))).all()
+    affected = {user_id for _, _, user_id, _ in posts}
+    affected |= set(db.session.scalars(select(Comment.user_id).where(Comment.post_id.in_(post_ids))))
+    Flag.query.filter(Flag.comment_id.in_(select(Comment.id).where(Comment.post_id.in_(post_ids)))).delete(synchronize_session=False)
+    Comment.query.filter(Comment.post_id.in_(post_ids)).delete(synchronize_session=False)
+    Notification.query.filter(Notification.post_id.in_(post_ids)).delete(synchronize_session=False)
+    Subscription.query.filter(Subscription.post_id.in_(post_ids)).delete(synchronize_session=False)
+    TimelineEntry.query.filter(TimelineEntry.post_id.in_(post_ids)).delete(synchronize_session=False)
+    Flag.query.filter(Flag.post_id.in_(post_ids)).delete(synchronize_session=False)
+    Vote.query.filter(Vote.post_id.in_(post_ids)).delete(synchronize_session=False)
+    PostStats.query.filter(PostStats.post_id.in_(post_ids)).delete(synchronize_session=False)
+    Post.query.filter(Post.id.in_(post_ids)).delete(synchronize_session=False)
+    UserStats.recount(affected)
+    feed_cache.posts_removed([(post_id, category_id) for post_id, category_id, _, _ in posts])
+    for post_id, _, _, title in posts:
+        suggest.removed('post', post_id, title)
 
 def admin_routes(app):
     @app.route('/admin')
@@ -10,10 +110,41 @@ def admin_routes(app):
         if not current_user.is_admin:
             flash('Admin access required!')
             return redirect(url_for('index'))
-        
-        flagged_posts = db.session.query(Flag, Post).join(Post).filter(Flag.post_id.isnot(None)).all()
-        flagged_comments = db.session.query(Flag, Comment).join(Comment).filter(Flag.comment_id.isnot(None)).all()
-        return render_template_string(ADMIN_TEMPLATE, flagged_posts=flagged_posts, flagged_comments=flagged_comments)
+
+        page_size = app.config['ADMIN_QUEUE_PAGE_SIZE']
+        post_cursor = _parse_cursor(request.args.get('posts_after'))
+        comment_cursor = _parse_cursor(request.args.get('comments_after'))
+        flagged_posts, next_posts = _flag_queue(Post, Flag.post_id, post_cursor, page_size)
+        flagged_comments, next_comments = _flag_queue(Comment, Flag.comment_id, comment_cursor, page_size)
+        return render_template_string(ADMIN_TEMPLATE, flagged_posts=flagged_posts, flagged_comments=flagged_comments,
+                                      next_posts=next_posts, next_comments=next_comments)
+
+    @app.route('/admin/bulk', methods=['POST'])
+    @login_required
+    def bulk_moderate():
+        if not current_user.is_admin:
+            flash('Admin access required!')
+            return redirect(url_for('index'))
+
+        action = request.form.get('action')
+        post_ids = request.form.getlist('post_ids', type=int)
+        comment_ids = request.form.getlist('comment_ids', type=int)
+        if action not in ('dismiss', 'delete') or not (post_ids or comment_ids):
+            flash('Select items and an action!')
+            return redirect(url_for('admin_dashboard'))
+
+        # Whole batch in one transaction: clearing a spam wave is one request, all-or-nothing
+        if action == 'dismiss':
+            if post_ids:
+                clear_flags('post', post_ids)
+            if comment_ids:
+                clear_flags('comment', comment_ids)
+        else:
+            _delete_comments(comment_ids)
+            _delete_posts(post_ids)
+        db.session.commit()
+        flash(f'{"Dismissed flags on" if action == "dismiss" else "Deleted"} {len(post_ids)} post(s) and {len(comment_ids)} comment(s)!')
+        return redirect(url_for('admin_dashboard'))
 
     @app.route('/flag/post/<int:post_id>', methods=['POST'])
     @login_required
@@ -22,15 +153,15 @@ def admin_routes(app):
         if not reason:
             flash('Reason required!')
             return redirect(url_for('index'))
-        
+
         post = db.session.get(Post, post_id)
         if not post:
             flash('Post not found!')
             return redirect(url_for('index'))
-        
-        flag = Flag(user_id=current_user.id, post_id=post.id, reason=reason)
-        db.session.add(flag)
-        db.session.commit()
+
+        if not flag_target('post', post.id, current_user.id, reason):
+            flash('You already flagged this post!')
+            return redirect(url_for('index'))
         flash('Post flagged for review!')
         return redirect(url_for('index'))
 
@@ -41,15 +172,15 @@ def admin_routes(app):
         if not reason:
             flash('Reason required!')
             return redirect(url_for('index'))
-        
+
         comment = db.session.get(Comment, comment_id)
         if not comment:
             flash('Comment not found!')
             return redirect(url_for('index'))
-        
-        flag = Flag(user_id=current_user.id, comment_id=comment.id, reason=reason)
-        db.session.add(flag)
-        db.session.commit()
+
+        if not flag_target('comment', comment.id, current_user.id, reason):
+            flash('You already flagged this comment!')
+            return redirect(url_for('index'))
         flash('Comment flagged for review!')
         return redirect(url_for('index'))
 
@@ -59,13 +190,13 @@ def admin_routes(app):
         if not current_user.is_admin:
             flash('Admin access required!')
             return redirect(url_for('admin_dashboard'))
-        
+
         post = db.session.get(Post, post_id)
         if not post:
             flash('Post not found!')
             return redirect(url_for('admin_dashboard'))
-        
-        db.session.delete(post)
+
+        _delete_posts([post.id])  # Fixed: Also clears notifications (ORM delete tried to NULL their post_id)
         db.session.commit()
         flash('Post deleted!')
         return redirect(url_for('admin_dashboard'))
@@ -76,13 +207,13 @@ def admin_routes(app):
         if not current_user.is_admin:
             flash('Admin access required!')
             return redirect(url_for('admin_dashboard'))
-        
+
         comment = db.session.get(Comment, comment_id)
         if not comment:
             flash('Comment not found!')
             return redirect(url_for('admin_dashboard'))
-        
-        db.session.delete(comment)
+
+        _delete_comments([comment.id])
         db.session.commit()
         flash('Comment deleted!')
         return redirect(url_for('admin_dashboard'))
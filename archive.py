@@ -0,0 +1,77 @@
+"""Hot/cold split: old posts and read notifications move to the archived_* tables in bulk batches.
+
+A post is archived, with its comments, votes and view counters, once it and its newest comment are older than
+ARCHIVE_POST_DAYS and nothing on it is flagged (the moderation queue only reads the hot tables). Archived posts
+stay readable, read-only, at /post/<id>. Read notifications older than ARCHIVE_NOTIFICATION_DAYS follow the same
+path, so feeds, threads and the notification list only ever scan recent rows.
+"""
+from datetime import datetime, timedelta, timezone
+import click
+from sqlalchemy import delete, exists, insert, select, text
+from models import (db, Post, Comment, Vote, PostStats, Notification, Subscription, TimelineEntry, Flag,
+                    ArchivedPost, ArchivedComment, ArchivedVote, ArchivedPostStats, ArchivedNotification)
+
+def _move(model, archive_model, criterion):
+    """Copy the matching rows into the archive table, then delete them from the hot one; returns rows moved."""
+    hot = model.__table__
+    db.session.execute(insert(archive_model.__table__).from_select(hot.c.keys(), select(hot).where(criterion)))
+    return db.session.execute(delete(hot).where(criterion)).rowcount
+
+def archivable_posts(cutoff):
+    active = exists().where(Comment.post_id == Post.id, Comment.timestamp >= cutoff)
+    flagged = exists().where(Flag.post_id == Post.id)
+    comment_flagged = exists().where(Flag.comment_id == Comment.id, Comment.post_id == Post.id)
+    return select(Post.id).where(Post.timestamp < cutoff, ~active, ~flagged, ~comment_flagged)
+
+def archive_posts(cutoff, batch_size):
+    """Archive quiet posts older than cutoff, batch_size posts per transaction; returns how many moved."""
+    moved = 0
+    while True:
+        ids = list(db.session.scalars(archivable_posts(cutoff).order_by(Post.id).limit(batch_size)))
+        if not ids:
+            return moved
+        for model, archive_model in ((Notification, ArchivedNotification), (Vote, ArchivedVote),
+                                     (PostStats, ArchivedPostStats), (Comment, ArchivedComment)):
+            _move(model, archive_model, model.post_id.in_(ids))
+        # Nobody comments on an archived post, so nothing is left to notify or to show on home timelines
+        db.session.execute(delete(Subscription).where(Subscription.post_id.in_(ids)))
+        db.session.execute(delete(TimelineEntry).where(TimelineEntry.post_id.in_(ids)))
+        moved += _move(Post, ArchivedPost, Post.id.in_(ids))
+        db.session.commit()  # Short write transactions: other writers only wait for one batch
+
+def archive_notifications(cutoff, batch_size):
+    """Archive read notifications older than cutoff; returns how many moved."""
+    moved = 0
+    while True:
+        ids = list(db.session.scalars(select(Notification.id).where(Notification.is_read.is_(True),
+                                                                    Notification.timestamp < cutoff)
+                                      .order_by(Notification.id).limit(batch_size)))
+        if not ids:
+            return moved
+        moved += _move(Notification, ArchivedNotification, Notification.id.in_(ids))
+        db.session.commit()
+
+def reusable_id_tables():
+    """Hot SQLite tables created without AUTOINCREMENT (before it was set), where a new row could take an archived id."""
+    if db.engine.dialect.name != 'sqlite':
+        return []
+    tables = [model.__tablename__ for model in (Post, Comment, Vote, Notification)]
+    return [t for t in tables if 'AUTOINCREMENT' not in (db.session.scalar(
+        text('SELECT sql FROM sqlite_master WHERE type = :type AND name = :name'), {'type': 'table', 'name': t}) or '').upper()]
+
+def init_app(app):
+    @app.cli.command('archive')
+    @click.option('--post-days', type=int, default=None, help='Archive posts quiet for this long (ARCHIVE_POST_DAYS).')
+    @click.option('--notification-days', type=int, default=None, help='Archive read notifications older than this.')
+    def archive_command(post_days, notification_days):
+        """Move old posts (with comments, votes, view counts) and old read notifications to the archive tables."""
+        unsafe = reusable_id_tables()
+        if unsafe:
+            raise click.ClickException(f'Tables {", ".join(unsafe)} reuse freed ids; rebuild them with AUTOINCREMENT '
+                                       'before archiving, or archived ids would be handed to new rows')
+        now = datetime.now(timezone.utc)
+        batch_size = app.config['ARCHIVE_BATCH_SIZE']
+        posts = archive_posts(now - timedelta(days=post_days or app.config['ARCHIVE_POST_DAYS']), batch_size)
+        notifications = archive_notifications(
+            now - timedelta(days=notification_days or app.config['ARCHIVE_NOTIFICATION_DAYS']), batch_size)
+        click.echo(f'Archived {posts} posts and {notifications} notifications')
@@ -0,0 +1,227 @@
+"""ASGI serving mode: uvicorn --factory asgi:create_asgi_app
+
+Long-held and I/O-bound endpoints run natively on the event loop, with their blocking DB work on a
+bounded thread pool. Every other route is bridged to the regular Flask (WSGI) app unchanged.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from asgiref.wsgi import WsgiToAsgi
+from flask import current_app, jsonify, request
+from flask_login import current_user
+from models import db, Notification
+from mail_utils import build_notification_digest, send_message_async
+from routes import longpoll_wait, posts_since, upload_filename, upload_path, create_post
+from auth import invalidate_session_user
+from ratelimit import limiter, forwarded_environ
+from utils import allowed_file
+
+def _environ(scope, body):
+    """Minimal WSGI environ for an ASGI HTTP scope, so Flask's request/session/login machinery works as usual."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+async def _read_body(receive, limit):
+    """The full request body, or None once it exceeds limit bytes."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return b''
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def _send_response(send, status, headers, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+def _finish(rv):
+    """Turn a view return value into (status, headers, body), running after_request hooks and saving the session."""
+    response = current_app.process_response(current_app.make_response(rv))
+    return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+
+def _denied(ratelimit_endpoint=None):
+    """Run before_request hooks, rate limits and the login check; a finished response means stop here.
+
+    Async paths don't match a Flask route, so they borrow the limit of their sync twin.
+    """
+    rv = current_app.preprocess_request() or (ratelimit_endpoint and limiter.check(ratelimit_endpoint))
+    if rv is None and not current_user.is_authenticated:
+        rv = jsonify({'success': False, 'error': 'Login required'}), 401
+    return _finish(rv) if rv is not None else None
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+class AsyncApp:
+    """ASGI front for the Flask app: a few async endpoints, everything else through WsgiToAsgi."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.db_pool = ThreadPoolExecutor(flask_app.config['ASYNC_DB_THREADS'], thread_name_prefix='async-db')
+        self.routes = {
+            ('GET', '/async/feed/updates'): self.feed_updates,
+            ('POST', '/async/notifications'): self.notifications,
+            ('POST', '/async/posts'): self.upload_post,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        handler = self.routes.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+        await handler(scope, receive, send)
+
+    async def _in_request(self, scope, body, fn, *args):
+        """Run fn(*args) on the bounded DB pool inside a Flask request context built from scope."""
+        def call():
+            with self.flask_app.request_context(forwarded_environ(self.flask_app, _environ(scope, body))):
+                return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.db_pool, call)
+
+    async def feed_updates(self, scope, receive, send):
+        """Async twin of /feed/updates: the wait between polls is an asyncio.sleep, not a parked thread."""
+        config = self.flask_app.config
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            since = 0
+        wait = longpoll_wait(query.get('wait', ['0'])[0], config['LONGPOLL_MAX_SECONDS'])
+        denied = await self._in_request(scope, b'', _denied)
+        if denied:
+            return await _send_response(send, *denied)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            posts = await self._in_request(scope, b'', posts_since, since)
+            if posts or loop.time() >= deadline:
+                break
+            await asyncio.sleep(config['LONGPOLL_INTERVAL'])
+        await _send_response(send, *await self._in_request(scope, b'', _finish, {'posts': posts}))
+
+    async def notifications(self, scope, receive, send):
+        """Async twin of /notifications: email the digest over SMTP on the loop, then mark everything read."""
+        body = await _read_body(receive, self.flask_app.config['MAX_CONTENT_LENGTH']) or b''
+
+        def prepare():
+            denied = _denied()
+            if denied:
+                return denied, None
+            msg = build_notification_digest(current_app, current_user)
+            return None, msg and (msg.as_bytes(), msg.sender, list(msg.send_to))
+
+        denied, email = await self._in_request(scope, body, prepare)
+        if denied:
+            return await _send_response(send, *denied)
+        emailed = bool(email) and await send_message_async(self.flask_app.config, *email, self.flask_app.logger)
+
+        def mark_read():
+            notifs = Notification.query.filter_by(user_id=current_user.id).order_by(Notification.timestamp.desc()).all()
+            payload = [{'id': n.id, 'message': n.message, 'timestamp': n.timestamp.isoformat(), 'is_read': n.is_read,
+                        'event_count': n.event_count}
+                       for n in notifs]
+            for n in notifs:
+                n.is_read = True
+            db.session.commit()
+            invalidate_session_user(current_user.id)
+            return _finish({'emailed': emailed, 'notifications': payload})
+
+        await _send_response(send, *await self._in_request(scope, body, mark_read))
+
+    async def upload_post(self, scope, receive, send):
+        """Async twin of the feed's post form: the body streams in on the loop, DB work goes to the pool."""
+        body = await _read_body(receive, self.flask_app.config['MAX_CONTENT_LENGTH'])
+        if body is None:
+            return await _send_response(send, 413, [('Content-Type', 'application/json')],
+                                        b'{"success": false, "error": "Upload too large"}')
+
+        def validate():
+            denied = _denied('index')
+            if denied:
+                return denied, None
+            title = request.form.get('title', '').strip()
+            category_id = request.form.get('category_id', type=int)
+            if not title or not category_id:
+                return _finish(({'success': False, 'error': 'Title and category required'}, 400)), None
+            upload = None
+            file = request.files.get('image')
+            if file and file.filename and allowed_file(file.filename):
+                filename = upload_filename(file.filename)
+                upload = (upload_path(filename), file.read(), f'/uploads/{filename}')
+            return None, (title, category_id, upload)
+
+        denied, fields = await self._in_request(scope, body, validate)
+        if denied:
+            return await _send_response(send, *denied)
+        title, category_id, upload = fields
+        image_path = None
+        if upload:
+            path, data, image_path = upload
+            # asyncio has no native file API: write on the default executor, never on the DB pool
+            await asyncio.to_thread(_write_file, path, data)
+
+        def insert():
+            post = create_post(current_user.id, title, category_id, image_path)
+            if post is None:
+                if image_path:
+                    os.remove(path)
+                return _finish(({'success': False, 'error': 'Duplicate of a recent post'}, 409))
+            return _finish(({'success': True, 'id': post.id, 'image_path': image_path}, 201))
+
+        await _send_response(send, *await self._in_request(scope, b'', insert))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.db_pool.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+def create_asgi_app(flask_app=None):
+    """ASGI adapter around the app factory."""
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    return AsyncApp(flask_app)
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from flask import request, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:  # Optional: without it everything is served gzip-only
+    brotli = None
+
+ASSETS = ('app.css', 'app.js')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};:,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+def minify_js(text):
+    """Conservative: drop whole-line comments, indentation and blank lines; never rewrites code."""
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def _write_atomic(path, data):
+    # Several workers may build at once; rename makes each file appear complete or not at all
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def build_assets(src_dir, dist_dir):
+    """Minify, content-hash and precompress each asset; returns {'app.css': 'app.<hash>.css', ...}.
+
+    Outputs are named by content, so an existing file is already correct and is left alone.
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for name in ASSETS:
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(src_dir, name), encoding='utf-8') as f:
+            data = MINIFIERS[ext](f.read()).encode('utf-8')
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        path = os.path.join(dist_dir, hashed)
+        if not os.path.exists(path):
+            _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli:
+                _write_atomic(path + '.br', brotli.compress(data, quality=11))
+            _write_atomic(path, data)  # Last, so its presence means the compressed siblings exist too
+        manifest[name] = hashed
+    return manifest
+
+def negotiate_encoding(accept_encodings):
+    """Best content-coding we can produce for the client: br, then gzip, else None."""
+    for encoding in ('br', 'gzip'):
+        if (encoding != 'br' or brotli) and accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level)
+
+def init_app(app):
+    src_dir = os.path.join(app.static_folder, 'src')
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    manifest = {}
+
+    def asset_url(name):
+        if not manifest:  # Built on first use per process (cheap) so startup does no file I/O
+            manifest.update(build_assets(src_dir, dist_dir))
+        return f'/assets/{manifest[name]}'
+
+    @app.context_processor
+    def inject_asset_url():
+        return {'asset_url': asset_url}
+
+    @app.route('/assets/<filename>')
+    def asset(filename):
+        if filename.endswith(('.gz', '.br')):
+            abort(404)
+        encoding = negotiate_encoding(request.accept_encodings)
+        suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+        if suffix and not os.path.exists(os.path.join(dist_dir, filename + suffix)):
+            encoding, suffix = None, ''
+        response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE  # Content-hashed name: a change means a new URL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.after_request
+    def compress_html(response):
+        # Compress rendered pages on the fly; assets above are precompressed, everything else passes through
+        if (response.mimetype != 'text/html' or response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')  # Even when sent plain: a cache must not serve this copy to gzip clients
+        encoding = negotiate_encoding(request.accept_encodings)
+        data = response.get_data()
+        if not encoding or len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, encoding, app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @app.cli.command('assets')
+    def build_assets_command():
+        """Prebuild hashed, minified, precompressed CSS/JS (e.g. at deploy time)."""
+        for name, hashed in build_assets(src_dir, dist_dir).items():
+            print(f'{name} -> {hashed}')
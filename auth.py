@@ -1,7 +1,9 @@
-from flask import request, redirect, url_for, flash, render_template_string
-from flask_login import login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import request, redirect, url_for, flash, render_template_string, current_app
+from flask_login import UserMixin, login_user, login_required, logout_user, current_user
 from models import db, User
+from cache import MemoryCache
+from passwords import hash_password, verify_password, needs_rehash
+import suggest
 
 LOGIN_TEMPLATE = '''
 <!DOCTYPE html>
@@ -30,6 +32,35 @@ REGISTER_TEMPLATE = '''
 </body></html>
 '''
 
+class SessionUser(UserMixin):
+    """The few fields views and templates read off current_user, cached so most requests skip the User query."""
+    def __init__(self, id, username, email, is_admin, unread_notifications):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_admin = is_admin
+        self.unread_notifications = unread_notifications
+
+def init_session_cache(app):
+    app.extensions['session_users'] = MemoryCache(maxsize=app.config['SESSION_CACHE_SIZE'],
+                                                  default_ttl=app.config['SESSION_CACHE_TTL'])
+
+def load_session_user(user_id):
+    cache = current_app.extensions['session_users']
+    essentials = cache.get(user_id)
+    if essentials is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        essentials = {'id': user.id, 'username': user.username, 'email': user.email,
+                      'is_admin': user.is_admin, 'unread_notifications': user.unread_notifications}
+        cache.set(user_id, essentials)
+    return SessionUser(**essentials)
+
+def invalidate_session_user(user_id):
+    """Drop a cached session user after changing anything it holds (e.g. their unread count)."""
+    current_app.extensions['session_users'].delete(user_id)
+
 def register_routes(app):
     @app.route('/login', methods=['GET', 'POST'])
     def login():
@@ -37,7 +68,10 @@ def register_routes(app):
             username = request.form['username']
             password = request.form['password']
             user = db.session.query(User).filter_by(username=username).first()
-            if user and check_password_hash(user.password_hash, password):
+            if user and verify_password(user.password_hash, password):
+                if needs_rehash(user.password_hash):  # Hash parameters changed: upgrade while we have the plaintext
+                    user.password_hash = hash_password(password)
+                    db.session.commit()
                 login_user(user)
                 return redirect(url_for('index'))
             flash('Invalid credentials!')
@@ -55,9 +89,10 @@ def register_routes(app):
             if db.session.query(User).filter_by(email=email).first():
                 flash('Email taken!')
                 return redirect(url_for('register'))
-            user = User(username=username, email=email, password_hash=generate_password_hash(password))
+            user = User(username=username, email=email, password_hash=hash_password(password))
             db.session.add(user)
             db.session.commit()
+            suggest.added('user', user.username, user.username)
             flash('Registration successful! Welcome aboard.')  # Updated flash for better UX
             login_user(user)  # Fixed: Auto-login after registration
             return redirect(url_for('index'))  # Redirect to feed, not login
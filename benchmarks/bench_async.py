@@ -0,0 +1,76 @@
+"""Concurrent long-poll capacity: sync gunicorn (threads) vs. the ASGI mode under uvicorn.
+
+Usage: python benchmarks/bench_async.py [--connections 64] [--wait 3] [--threads 8]
+Opens --connections long-polls that each wait --wait seconds for new posts, and times a probe
+request fired while they are held. Runs against the local dev DB (seeded first).
+"""
+import argparse
+import http.cookiejar
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _opener():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+def _wait_until_up(base, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base + '/login').read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server at {base} did not come up')
+
+def run(name, command, poll_path, port, connections, wait):
+    env = dict(os.environ, PORT=str(port), RATELIMIT_ENABLED='False')
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    try:
+        _wait_until_up(base)
+        opener = _opener()
+        opener.open(base + '/register', data=f'username=bench{port}{int(time.time())}&email=b{time.time()}@x.io&password=pw'.encode()).read()
+        url = f'{base}{poll_path}?since=1000000000&wait={wait}'
+
+        def poll(_):
+            opener.open(url, timeout=wait * connections + 30).read()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(connections) as pool:
+            futures = [pool.submit(poll, i) for i in range(connections)]
+            time.sleep(0.5)  # Let the long-polls occupy the server
+            probe_start = time.monotonic()
+            opener.open(base + '/login').read()
+            probe = time.monotonic() - probe_start
+            for f in futures:
+                f.result()
+        elapsed = time.monotonic() - started
+        held = connections * wait / elapsed  # Average number of long-polls the server held at once
+        print(f'{name:>6}: {connections} long-polls in {elapsed:.1f}s | ~{held:.0f} held concurrently | probe {probe * 1000:.0f} ms')
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--wait', type=float, default=3)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5088)
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed'], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    os.environ['WEB_CONCURRENCY'], os.environ['WEB_THREADS'] = '1', str(args.threads)
+    run('sync', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        '/feed/updates', args.port, args.connections, args.wait)
+    run('async', [sys.executable, '-m', 'uvicorn', '--factory', 'asgi:create_asgi_app', '--port', str(args.port + 1),
+                  '--log-level', 'warning'], '/async/feed/updates', args.port + 1, args.connections, args.wait)
+
+if __name__ == '__main__':
+    main()
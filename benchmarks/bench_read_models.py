@@ -0,0 +1,81 @@
+"""Rendering-path cost of a large feed: full ORM objects vs. read_models' column-only rows.
+
+Usage: python benchmarks/bench_read_models.py [--posts 5000] [--votes 3] [--repeat 5]
+Builds a throwaway SQLite DB, then for each approach reports the median time to load the feed and read the
+attributes the feed template uses, and the peak Python memory allocated while doing it (tracemalloc).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from config import Config
+
+def orm_feed(Post):
+    """What the feed did before read_models: Post objects with votes eager-loaded, user/category lazy."""
+    posts = Post.query.filter_by(hidden=False).options(joinedload(Post.votes)).order_by(Post.timestamp.desc()).all()
+    return [(p.title, p.user.username, p.category.name, p.score, p.comment_count, p.image_path) for p in posts]
+
+def row_feed(post_rows):
+    return [(p.title, p.author, p.category, p.score, p.comment_count, p.image_path) for p in post_rows()]
+
+def measure(fn, db, repeat):
+    times = []
+    for _ in range(repeat):
+        db.session.remove()  # Fresh session each run: no identity-map reuse between runs
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    db.session.remove()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return len(result), statistics.median(times), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--votes', type=int, default=3, help='votes per post')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        from app import create_app
+        from models import db, User, Category, Post, Vote
+        from read_models import post_rows
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            voters = args.votes + 1
+            db.session.execute(insert(User), [{'username': f'u{i}', 'email': f'u{i}@example.com', 'password_hash': 'x'}
+                                              for i in range(voters)])
+            db.session.execute(insert(Category), [{'name': f'Cat {i}', 'slug': f'cat-{i}'} for i in range(5)])
+            db.session.execute(insert(Post), [{'title': f'Question number {i}', 'user_id': i % voters + 1,
+                                               'category_id': i % 5 + 1} for i in range(args.posts)])
+            db.session.execute(insert(Vote), [{'user_id': v + 1, 'post_id': p + 1, 'value': 1 if (p + v) % 3 else -1}
+                                              for p in range(args.posts) for v in range(args.votes)])
+            db.session.commit()
+
+            results = {'ORM objects': measure(lambda: orm_feed(Post), db, args.repeat),
+                       'read models': measure(lambda: row_feed(post_rows), db, args.repeat)}
+            db.drop_all()
+            db.engine.dispose()
+
+    for name, (rows, seconds, peak) in results.items():
+        print(f'{name:>12}: {rows} posts | {seconds * 1000:8.1f} ms | peak {peak / 1e6:6.1f} MB')
+    (_, orm_s, orm_mem), (_, row_s, row_mem) = results.values()
+    print(f'Speedup {orm_s / row_s:.1f}x, memory {orm_mem / row_mem:.1f}x smaller')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
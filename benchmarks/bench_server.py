@@ -0,0 +1,69 @@
+"""Throughput of the gunicorn launcher with 1 worker vs. one worker per core.
+
+Usage: python benchmarks/bench_server.py [--seconds 5] [--clients 16] [--min-speedup 1.5]
+Exits non-zero if the multi-worker run doesn't beat a single worker by --min-speedup.
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = '/login'  # Template render, no DB: isolates the server's CPU scaling
+
+def _client(url, seconds):
+    done, deadline = 0, time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+        done += 1
+    return done
+
+def _wait_until_up(url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server at {url} did not come up')
+
+def run(workers, port, seconds, clients):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), WEB_THREADS='1', PORT=str(port))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}{PATH}'
+    try:
+        _wait_until_up(url)
+        with ProcessPoolExecutor(clients) as pool:  # Client processes, so the load generator isn't GIL-bound
+            total = sum(pool.map(_client, [url] * clients, [seconds] * clients))
+        return total / seconds
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--min-speedup', type=float, default=1.5)
+    args = parser.parse_args()
+
+    cores = multiprocessing.cpu_count()
+    single = run(1, args.port, args.seconds, args.clients)
+    multi = run(cores, args.port, args.seconds, args.clients)
+    speedup = multi / single
+    print(f'1 worker: {single:.0f} req/s | {cores} workers: {multi:.0f} req/s | speedup {speedup:.2f}x')
+    if cores < 2:
+        print('Only one core available: scaling not checked.')
+        return 0
+    return 0 if speedup >= args.min_speedup else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Cold-start time: fresh interpreter -> create_app() -> first /healthz and /readyz responses.
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--max-ms 0]
+Each run is a new process, so import costs are paid every time, as on a container start or scale-out.
+With --max-ms, exits non-zero if the median time to a ready app exceeds it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get('/healthz')
+t3 = time.perf_counter()
+client.get('/readyz')
+t4 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'healthz': t3 - t2, 'readyz': t4 - t3}))
+'''
+
+def run_once():
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - start  # Includes interpreter startup and exit
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=0, help='fail if median import+create_app+readyz exceeds this')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for phase in ('import', 'create_app', 'healthz', 'readyz', 'process'):
+        values = [r[phase] * 1000 for r in runs]
+        print(f'{phase:>10}: median {statistics.median(values):7.1f} ms | max {max(values):7.1f} ms')
+    ready = statistics.median((r['import'] + r['create_app'] + r['readyz']) * 1000 for r in runs)
+    print(f'Time to ready (median): {ready:.1f} ms')
+    return 1 if args.max_ms and ready > args.max_ms else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryCache:
+    """Bounded in-process LRU cache with optional per-key TTL."""
+
+    def __init__(self, maxsize=10000, default_ttl=None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._get(key, default)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key, fn, ttl=None):
+        """Atomically replace the value with fn(current or None); returning None from fn deletes the key."""
+        with self._lock:
+            value = fn(self._get(key))
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._set(key, value, ttl)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key, value, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+class SqliteCache:
+    """Cache shared by every worker process on the host, backed by a local SQLite file. Values must be JSON-serialisable."""
+
+    def __init__(self, path, default_ttl=None):
+        self.path = path
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._conn().execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)')
+
+    def get(self, key, default=None):
+        row = self._conn().execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        self._write(self._conn(), key, value, ttl)
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def update(self, key, fn, ttl=None):
+        """Atomically replace the value with fn(current or None) across processes; returning None deletes the key."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')  # Takes the write lock up front so read-modify-write can't interleave
+        try:
+            value = fn(self.get(key))
+            if value is None:
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            else:
+                self._write(conn, key, value, ttl)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache')
+
+    def _write(self, conn, key, value, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, json.dumps(value), time.time() + ttl if ttl else None))
+        if random.random() < 0.01:  # Occasionally sweep expired rows so the file stays small
+            conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+
+    def _conn(self):
+        # One connection per thread per process: SQLite handles must not cross threads or forks
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+def make_cache(uri, maxsize=10000, default_ttl=None):
+    """Build a cache from a config value: 'memory' or 'sqlite:///path/to/file.db'."""
+    if uri == 'memory':
+        return MemoryCache(maxsize=maxsize, default_ttl=default_ttl)
+    if uri.startswith('sqlite:///'):
+        return SqliteCache(uri[len('sqlite:///'):], default_ttl=default_ttl)
+    raise ValueError(f'Unsupported cache backend: {uri}')
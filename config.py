@@ -4,9 +4,74 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key_here')
     SQLALCHEMY_DATABASE_URI = 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Read replicas, comma-separated (e.g. sqlite:///replica.db or postgresql://...): GET requests read from them
+    DATABASE_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URIS', '').split(',') if uri.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))  # A user's reads stay on the primary after they write
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')  # e.g. 'pbkdf2:sha256:600000'; old hashes upgrade on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # Max concurrent hash computations
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 30))  # Seconds a logged-in user's essentials are reused
+    SESSION_CACHE_SIZE = 10000
+    FLAG_HIDE_THRESHOLD = int(os.environ.get('FLAG_HIDE_THRESHOLD', 5))  # Flags (one per reporter, plus system flags) before auto-hide
+    TASKS_EAGER = os.environ.get('TASKS_EAGER', 'False').lower() == 'true'  # Run background tasks inline
+    # Rate limiting (POSTs only, keyed by user or IP): 'memory' per process, or 'sqlite:///path' shared across workers
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE = os.environ.get('RATELIMIT_STORAGE', 'memory')
+    # Proxies in front of the app (1 on Render/Heroku) whose X-Forwarded-For is trusted for the client address.
+    # Leave at 0 when clients connect directly, or they could pick their own rate-limit bucket.
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+    RATELIMITS = {
+        'index': '10/minute',  # Post creation
+        'vote': '60/minute',
+        'comment': '20/minute',
+        'flag_post': '10/minute',
+        'flag_comment': '10/minute',
+        'register': '5/hour',
+    }
+    HOME_PAGE_SIZE = int(os.environ.get('HOME_PAGE_SIZE', 20))  # Posts per /home page (and per follow backfill)
+    FANOUT_MAX_FOLLOWERS = int(os.environ.get('FANOUT_MAX_FOLLOWERS', 10000))  # Busier sources are merged in on read
+    FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 30))  # Posts per page on / and /category/<slug>
+    # First-page post ids per feed: 'memory' per process, or 'sqlite:///path' shared (and kept current) across workers
+    FEED_CACHE_STORAGE = os.environ.get('FEED_CACHE_STORAGE', 'memory')
+    FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', 30))  # Bounds staleness from writes in other processes
+    FEED_CACHE_SIZE = 1000  # Feeds (global + categories) kept
+    SUGGEST_LIMIT = 8  # Suggestions per /search/suggest answer
+    SUGGEST_MIN_CHARS = 2  # Shorter prefixes match too much to be useful
+    SUGGEST_MAX_WORDS = 10  # Title words (from the start) that can begin a match
+    SUGGEST_REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS', 60))  # Pick up other workers' new rows
+    SUGGEST_REBUILD_SECONDS = int(os.environ.get('SUGGEST_REBUILD_SECONDS', 600))  # ...and drop their deleted/hidden ones
+    SUGGEST_CACHE_SECONDS = 30  # Browser cache for suggestion answers
+    VIEW_FLUSH_SECONDS = int(os.environ.get('VIEW_FLUSH_SECONDS', 30))  # Buffered post views are written this often
+    VIEW_BUFFER_MAX_POSTS = 5000  # ...or sooner, once this many posts have unflushed views (~1 KB each)
+    ARCHIVE_POST_DAYS = int(os.environ.get('ARCHIVE_POST_DAYS', 365))  # `flask archive`: posts with no newer activity
+    ARCHIVE_NOTIFICATION_DAYS = int(os.environ.get('ARCHIVE_NOTIFICATION_DAYS', 90))  # ...and read notifications
+    ARCHIVE_BATCH_SIZE = 500  # Rows per archive transaction
+    PROFILE_PAGE_SIZE = int(os.environ.get('PROFILE_PAGE_SIZE', 20))  # Posts per profile page
+    COMMENT_PAGE_SIZE = int(os.environ.get('COMMENT_PAGE_SIZE', 50))  # Comments per "load more" page on a post
+    COMMENT_MAX_DEPTH = 5  # Deeper replies collapse into a "continue this thread" link
+    COMMENT_MAX_REPLY_DEPTH = 50  # Replies below this depth are attached at it, keeping paths (and threads) bounded
+    NOTIFY_COALESCE_SECONDS = int(os.environ.get('NOTIFY_COALESCE_SECONDS', 600))  # Unread notifications per post merge within this window
+    NOTIFY_INLINE_MAX = int(os.environ.get('NOTIFY_INLINE_MAX', 200))  # Bigger threads fan out on the background worker
+    # That worker's queue is in memory: fan-outs still pending this long (lost in a restart) are redelivered by the
+    # next deferred fan-out's sweep, or by `flask init-db` at release
+    NOTIFY_RECOVER_SECONDS = int(os.environ.get('NOTIFY_RECOVER_SECONDS', 300))
+    LONGPOLL_MAX_SECONDS = 25  # Upper bound for ?wait= on /async/feed/updates (ASGI: waiting costs no thread)
+    # Upper bound for ?wait= on the WSGI /feed/updates, where a wait parks a worker thread (or a whole sync worker)
+    LONGPOLL_SYNC_MAX_SECONDS = int(os.environ.get('LONGPOLL_SYNC_MAX_SECONDS', 3))
+    LONGPOLL_INTERVAL = 1.0  # Seconds between checks while a long-poll waits
+    READY_MAX_PENDING_TASKS = int(os.environ.get('READY_MAX_PENDING_TASKS', 1000))  # /readyz fails past this backlog
+    ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))  # ASGI mode: threads for blocking DB work
+    COMPRESS_MIN_SIZE = 500  # Bytes; smaller HTML responses aren't worth compressing
+    COMPRESS_LEVEL = 5  # gzip level / brotli quality for on-the-fly HTML compression
+    # Near-duplicate detection for new posts/comments: 'flag' (auto-flag for moderators) or 'reject'
+    DUPLICATE_ACTION = os.environ.get('DUPLICATE_ACTION', 'flag')
+    DUPLICATE_MAX_DISTANCE = 3  # SimHash bits that may differ; the LSH bands guarantee recall up to 3
+    DUPLICATE_MIN_WORDS = 4  # Shorter texts aren't checked
+    DUPLICATE_WINDOW = int(os.environ.get('DUPLICATE_WINDOW', 10000))  # Recent items per kind kept in the index
+    ADMIN_QUEUE_PAGE_SIZE = int(os.environ.get('ADMIN_QUEUE_PAGE_SIZE', 20))  # Flagged targets per moderation page
+    ADMIN_FLAGS_PER_TARGET = 5  # Newest flags listed per target; the rest are only counted
 
     # Email config (Gmail with explicit TLS)
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
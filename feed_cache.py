@@ -0,0 +1,60 @@
+from flask import current_app
+from sqlalchemy import select
+from cache import make_cache
+from models import db, Post
+
+def init_app(app):
+    # Values are short id lists, one per feed: memory is bounded by FEED_CACHE_SIZE keys x (FEED_PAGE_SIZE + 1) ids
+    app.extensions['feed_cache'] = make_cache(app.config['FEED_CACHE_STORAGE'], maxsize=app.config['FEED_CACHE_SIZE'],
+                                              default_ttl=app.config['FEED_CACHE_TTL'])
+
+def _key(category_id):
+    return f'feed:{category_id}' if category_id else 'feed:all'
+
+def _capacity():
+    return current_app.config['FEED_PAGE_SIZE'] + 1  # One extra id tells whether there is a next page
+
+def first_page_ids(category_id=None):
+    """Newest visible post ids of the global feed (or one category), at most FEED_PAGE_SIZE + 1, from the cache."""
+    cache = current_app.extensions['feed_cache']
+    ids = cache.get(_key(category_id))
+    if ids is None:
+        q = select(Post.id).where(Post.hidden.is_(False))
+        if category_id:
+            q = q.where(Post.category_id == category_id)
+        # Filled from the primary: a lagging replica's list would stay cached (and be prepended to) long after it
+        # caught up
+        ids = list(db.session.scalars(q.order_by(Post.id.desc()).limit(_capacity()), bind_arguments={'bind': db.engine}))
+        cache.set(_key(category_id), ids)
+    return ids
+
+def post_added(post_id, category_id):
+    """Prepend a new post to the cached lists it belongs to; lists not cached yet are left to the next read."""
+    capacity = _capacity()
+    for key in (_key(None), _key(category_id)):
+        current_app.extensions['feed_cache'].update(
+            key, lambda ids: None if ids is None else sorted({post_id, *ids}, reverse=True)[:capacity])
+
+def posts_removed(posts):
+    """Drop deleted or hidden posts, given as (id, category_id) pairs, from the cached lists.
+
+    A full list that loses ids is discarded rather than left short: the posts that should slide up onto the first
+    page aren't in it, so the next read rebuilds it.
+    """
+    capacity = _capacity()
+    removed = {post_id for post_id, _ in posts}
+
+    def drop(ids):
+        if ids is None:
+            return None
+        kept = [i for i in ids if i not in removed]
+        return ids if len(kept) == len(ids) else (None if len(ids) >= capacity else kept)
+
+    for key in {_key(None)} | {_key(category_id) for _, category_id in posts}:
+        current_app.extensions['feed_cache'].update(key, drop)
+
+def posts_restored(category_ids):
+    """Unhidden posts may belong anywhere on the first page: forget the affected lists."""
+    cache = current_app.extensions['feed_cache']
+    for key in {_key(None)} | {_key(category_id) for category_id in category_ids}:
+        cache.delete(key)
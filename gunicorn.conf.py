@@ -0,0 +1,28 @@
+# Gunicorn settings for production; every value can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'  # Threads per worker need the threaded worker
+preload_app = True  # Build the app once in the master; workers fork with it already imported
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))  # How long old workers may drain in-flight requests
+keepalive = 5
+accesslog = os.environ.get('ACCESS_LOG')  # e.g. '-' for stdout; off by default
+
+def post_fork(server, worker):
+    # Pooled DB connections opened in the master must not be shared across processes.
+    # close=False drops them in the child without closing the parent's sockets.
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    # Write post views still buffered in this worker (view_stats) before it goes away: HUP, deploys, max_requests.
+    from wsgi import app
+    import view_stats
+    view_stats.flush_on_exit(app)
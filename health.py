@@ -0,0 +1,37 @@
+from flask import current_app, jsonify
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from models import db
+from tasks import tasks
+
+def _check_databases():
+    """'ok' or the error class for the primary and each replica: one SELECT 1 apiece, no ORM session."""
+    results = {}
+    for key in [None] + current_app.extensions.get('replicas', []):
+        try:
+            with db.engines[key].connect() as conn:
+                conn.execute(text('SELECT 1'))
+            results[key or 'primary'] = 'ok'
+        except SQLAlchemyError as e:
+            results[key or 'primary'] = f'error: {e.__class__.__name__}'
+    return results
+
+def health_routes(app):
+    @app.route('/healthz')
+    def healthz():
+        """Liveness: the process is up and serving. Never touches the DB, so a DB outage doesn't restart workers."""
+        return jsonify({'status': 'ok'})
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness: DB reachable and the background queue (notification fan-out, moderation) keeping up."""
+        databases = _check_databases()
+        pending = tasks.pending
+        queue_ok = pending <= app.config['READY_MAX_PENDING_TASKS'] and (tasks.alive or not pending)
+        ready = queue_ok and all(status == 'ok' for status in databases.values())
+        return jsonify({
+            'status': 'ready' if ready else 'unavailable',
+            'database': databases,
+            'tasks': {'pending': pending, 'worker_alive': tasks.alive},
+            'mail': 'configured' if app.config.get('MAIL_USERNAME') else 'disabled',
+        }), 200 if ready else 503
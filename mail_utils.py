@@ -2,6 +2,7 @@ from flask import render_template_string, current_app
 from flask_mail import Mail, Message
 from models import db, Notification
 from flask_login import current_user
+import asyncio
 import smtplib
 import time  # For retry
 
@@ -13,7 +14,7 @@ EMAIL_TEMPLATE = '''
     <p>You have {{ unread_count }} unread notifications:</p>
     <ul>
     {% for notif in notifications %}
-        <li>{{ notif.message }} - {{ notif.timestamp.strftime('%Y-%m-%d %H:%M') }}</li>
+        <li>{{ notif.message }}{% if notif.event_count > 1 %} (+{{ notif.event_count - 1 }} more){% endif %} - {{ notif.timestamp.strftime('%Y-%m-%d %H:%M') }}</li>
     {% endfor %}
     </ul>
     <p><a href="{{ url_for('notifications', _external=True) }}">View all</a> | <a href="{{ url_for('index', _external=True) }}">Back to Feed</a></p>
@@ -21,37 +22,50 @@ EMAIL_TEMPLATE = '''
 </html>
 '''
 
-def send_notification_digest(app):
-    """Send email digest for current user's unread notifications."""
-    if not current_user.is_authenticated or not current_user.email:
-        return
+def build_notification_digest(app, user):
+    """Message digesting user's unread notifications, or None if there is nothing (or no one) to send."""
+    if not user.is_authenticated or not user.email:
+        return None
 
     unread_notifs = db.session.query(Notification).filter_by(
-        user_id=current_user.id, is_read=False
+        user_id=user.id, is_read=False
     ).order_by(Notification.timestamp.desc()).all()
 
     if not unread_notifs:
-        return
+        return None
+
+    # Fixed: Safe get with default
+    sender = app.config.get('MAIL_USERNAME')
+
+    if not sender:
+        current_app.logger.error("No MAIL_USERNAME configured—skipping email")
+        return None
+
+    return Message(
+        subject=f"You have {len(unread_notifs)} new notifications on Q&A App",
+        sender=sender,
+        recipients=[user.email],
+        html=render_template_string(EMAIL_TEMPLATE,
+                                   user=user,
+                                   unread_count=len(unread_notifs),
+                                   notifications=unread_notifs)
+    )
+
+def get_mail(app):
+    """Flask-Mail, initialised on first send so startup never pays for it."""
+    mail = app.extensions.get('mail')
+    if mail is None:
+        mail = Mail(app)  # Registers itself in app.extensions['mail']
+    return mail
 
+def send_notification_digest(app):
+    """Send email digest for current user's unread notifications."""
     with app.app_context():
-        # Fixed: Safe get with default
-        sender = app.config.get('MAIL_USERNAME')
-        
-        if not sender:
-            current_app.logger.error("No MAIL_USERNAME configured—skipping email")
+        msg = build_notification_digest(app, current_user)
+        if msg is None:
             return
-        
-        
-        msg = Message(
-            subject=f"You have {len(unread_notifs)} new notifications on Q&A App",
-            sender=sender,
-            recipients=[current_user.email],
-            html=render_template_string(EMAIL_TEMPLATE, 
-                                       user=current_user, 
-                                       unread_count=len(unread_notifs),
-                                       notifications=unread_notifs)
-        )
-        mail = current_app.extensions['mail']
+
+        mail = get_mail(current_app)
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -71,4 +85,31 @@ def send_notification_digest(app):
                 else:
                     time.sleep(2 ** attempt)
         else:
-            current_app.logger.error("Email send failed after retries.")
\ No newline at end of file
+            current_app.logger.error("Email send failed after retries.")
+
+async def send_message_async(config, raw_message, sender, recipients, logger):
+    """Send an already-rendered message over SMTP on the event loop (ASGI mode). Returns True if sent.
+
+    Takes bytes rather than a Message because rendering one needs an app context.
+    """
+    import aiosmtplib  # Only needed when serving via asgi.py
+
+    if config.get('MAIL_SUPPRESS_SEND', config.get('TESTING')):
+        return False
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            await aiosmtplib.send(raw_message, sender=sender, recipients=recipients,
+                                  hostname=config['MAIL_SERVER'], port=config['MAIL_PORT'],
+                                  username=config.get('MAIL_USERNAME'), password=config.get('MAIL_PASSWORD'),
+                                  start_tls=config['MAIL_USE_TLS'], use_tls=config['MAIL_USE_SSL'])
+            return True
+        except aiosmtplib.SMTPSenderRefused as e:
+            logger.error(f"SMTP auth failed: {e}. Check app password.")
+            return False
+        except Exception as e:
+            logger.warning(f"Async email send failed on attempt {attempt+1}: {e}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(2 ** attempt)  # Backoff without holding a thread
+    logger.error("Max retries exceeded—email not sent.")
+    return False
@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime, timezone  # Fixed: Import timezone here
+from sqlalchemy import bindparam, func, or_, select, update
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # New: GET reads may go to a replica
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,9 +17,10 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)  # New: Admin role
     def __repr__(self):
         return f'<User {self.username}>'
+    stats = db.relationship('UserStats', uselist=False, lazy=True)
     @property
     def karma(self):
-        return sum(p.score for p in self.posts) if self.posts else 0
+        return self.stats.karma if self.stats else 0  # Fixed: Summary row, not a walk over every post's votes
     @property
     def unread_notifications(self):
         return db.session.query(Notification).filter_by(user_id=self.id, is_read=False).count()
@@ -25,16 +29,28 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     slug = db.Column(db.String(50), unique=True, nullable=False)
+    follower_count = db.Column(db.Integer, default=0, nullable=False)  # New: Maintained by timelines.follow/unfollow
     def __repr__(self):
         return f'<Category {self.name}>'
 
+# New: Tables archive.py moves rows out of. Archived rows keep their ids, so SQLite must never hand a freed id
+# (the highest one, once archived) to a new row: AUTOINCREMENT keeps ids unique across hot and archive tables.
+NEVER_REUSE_IDS = {'sqlite_autoincrement': True}
+
+COMMENT_ID_DIGITS = 12  # Width of each Comment.path segment: sibling order holds for ids below 10**12
+
 class Post(db.Model):
+    __table_args__ = NEVER_REUSE_IDS
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     image_path = db.Column(db.String(200))
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Fixed: Now uses imported timezone
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False, index=True)
+    flag_count = db.Column(db.Integer, default=0, nullable=False)  # New: Maintained by moderation.flag_target
+    hidden = db.Column(db.Boolean, default=False, nullable=False, index=True)  # New: Auto-hidden past FLAG_HIDE_THRESHOLD
+    comment_count = db.Column(db.Integer, default=0, nullable=False)  # New: Maintained on comment insert/delete for the feed
+    simhash = db.Column(db.BigInteger)  # New: Title fingerprint for near-duplicate detection (similarity.py)
     user = db.relationship('User', backref=db.backref('posts', lazy=True))
     category = db.relationship('Category', backref=db.backref('posts', lazy=True))
     comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete-orphan')
@@ -48,17 +64,166 @@ class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(500), nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Fixed
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    flag_count = db.Column(db.Integer, default=0, nullable=False)
+    hidden = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    # New: Threading. path is the zero-padded ancestor ids ('000000000001.000000000007'), so a post's thread or any
+    # subtree is one range scan on (post_id, path) and sorting by path yields depth-first display order
+    parent_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True, index=True)
+    path = db.Column(db.Text)  # COMMENT_ID_DIGITS + 1 characters per level; routes cap the depth
+    depth = db.Column(db.Integer, default=0, nullable=False)
+    reply_count = db.Column(db.Integer, default=0, nullable=False)
+    simhash = db.Column(db.BigInteger)  # New: Text fingerprint for near-duplicate detection
+    notify_pending = db.Column(db.Boolean, default=False, nullable=False, index=True)  # New: Queued fan-out not yet delivered
     user = db.relationship('User', backref=db.backref('comments', lazy=True))
     flags = db.relationship('Flag', backref='comment', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (db.Index('ix_comment_post_path', 'post_id', 'path'), NEVER_REUSE_IDS)
+
+    @staticmethod
+    def subtree_end(path):
+        """Exclusive upper bound for a subtree range: '/' sorts right after the '.' separator."""
+        return path + '/'
+
+    @staticmethod
+    def path_segment(comment_id):
+        return f'{comment_id:0{COMMENT_ID_DIGITS}d}'
+
+def repad_comment_paths():
+    """Rewrite paths stored with narrower segments (8 digits, before COMMENT_ID_DIGITS); returns rows changed.
+
+    Mixed widths would sort siblings wrongly. Run by `flask init-db`; a no-op once every path is current.
+    """
+    changed = 0
+    for table in (Comment.__table__, ArchivedComment.__table__):
+        current = or_(func.length(table.c.path) == COMMENT_ID_DIGITS,
+                      func.substr(table.c.path, COMMENT_ID_DIGITS + 1, 1) == '.')
+        rows = [{'target': comment_id, 'new_path': '.'.join(Comment.path_segment(int(s)) for s in path.split('.'))}
+                for comment_id, path in db.session.execute(select(table.c.id, table.c.path)
+                                                           .where(table.c.path.isnot(None), ~current))]
+        if rows:
+            db.session.execute(update(table).where(table.c.id == bindparam('target'))
+                               .values(path=bindparam('new_path')), rows)
+        changed += len(rows)
+    db.session.commit()
+    return changed
+
+@db.event.listens_for(Comment, 'after_insert')
+def _comment_inserted(mapper, connection, target):
+    """Fill in the materialized path and bump the post/parent counters inside the same flush."""
+    comments, posts = Comment.__table__, Post.__table__
+    path, depth = Comment.path_segment(target.id), 0
+    if target.parent_id:
+        parent_path, parent_depth = connection.execute(
+            select(comments.c.path, comments.c.depth).where(comments.c.id == target.parent_id)).one()
+        path, depth = f'{parent_path}.{path}', parent_depth + 1
+        connection.execute(update(comments).where(comments.c.id == target.parent_id)
+                           .values(reply_count=comments.c.reply_count + 1))
+    connection.execute(update(comments).where(comments.c.id == target.id).values(path=path, depth=depth))
+    connection.execute(update(posts).where(posts.c.id == target.post_id)
+                       .values(comment_count=posts.c.comment_count + 1))
+    _bump_stats(connection, target.user_id, comment_count=1)
+    set_committed_value(target, 'path', path)
+    set_committed_value(target, 'depth', depth)
+
+@db.event.listens_for(Comment, 'after_delete')
+def _comment_deleted(mapper, connection, target):
+    comments, posts = Comment.__table__, Post.__table__
+    connection.execute(update(posts).where(posts.c.id == target.post_id)
+                       .values(comment_count=posts.c.comment_count - 1))
+    _bump_stats(connection, target.user_id, comment_count=-1)
+    if target.parent_id:
+        connection.execute(update(comments).where(comments.c.id == target.parent_id)
+                           .values(reply_count=comments.c.reply_count - 1))
 
 class Vote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
     value = db.Column(db.Integer, nullable=False)
-    __table_args__ = (db.UniqueConstraint('user_id', 'post_id', name='unique_vote'),)
+    __table_args__ = (db.UniqueConstraint('user_id', 'post_id', name='unique_vote'),
+                      db.Index('ix_vote_post', 'post_id', 'value'),  # New: Covering index for per-post score sums
+                      NEVER_REUSE_IDS)
+
+class UserStats(db.Model):
+    """Per-user activity summary kept current on write, so a profile never aggregates over the user's history."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+    comment_count = db.Column(db.Integer, default=0, nullable=False)
+    karma = db.Column(db.Integer, default=0, nullable=False)  # Sum of votes on the user's posts
+    follower_count = db.Column(db.Integer, default=0, nullable=False)  # Maintained by timelines.follow/unfollow
+    joined_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    @staticmethod
+    def recount(user_ids):
+        """Recompute the rows for user_ids from the source tables, creating missing ones (caller commits).
+
+        For bulk deletes (which skip the ORM events) and users who predate the summary table.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        missing = user_ids - set(db.session.scalars(select(UserStats.user_id).where(UserStats.user_id.in_(user_ids))))
+        for user_id in missing:
+            # No signup date was recorded before this table existed: first activity is the best estimate
+            first = [db.session.scalar(select(func.min(model.timestamp)).where(model.user_id == user_id))
+                     for model in (Post, Comment)]
+            joined_at = min([t for t in first if t] or [datetime.now(timezone.utc)])
+            db.session.add(UserStats(user_id=user_id, joined_at=joined_at))
+        db.session.flush()
+        # Hot plus archived rows: archiving old posts doesn't change anyone's counts
+        db.session.execute(update(UserStats).where(UserStats.user_id.in_(user_ids)).values(
+            post_count=select(func.count(Post.id)).where(Post.user_id == UserStats.user_id).scalar_subquery()
+                       + select(func.count(ArchivedPost.id)).where(ArchivedPost.user_id == UserStats.user_id).scalar_subquery(),
+            comment_count=select(func.count(Comment.id)).where(Comment.user_id == UserStats.user_id).scalar_subquery()
+                          + select(func.count(ArchivedComment.id)).where(ArchivedComment.user_id == UserStats.user_id).scalar_subquery(),
+            karma=select(func.coalesce(func.sum(Vote.value), 0)).join(Post, Vote.post_id == Post.id)
+                  .where(Post.user_id == UserStats.user_id).scalar_subquery()
+                  + select(func.coalesce(func.sum(ArchivedVote.value), 0)).join(ArchivedPost, ArchivedVote.post_id == ArchivedPost.id)
+                  .where(ArchivedPost.user_id == UserStats.user_id).scalar_subquery(),
+            follower_count=select(func.count(Follow.id)).where(Follow.followed_user_id == UserStats.user_id).scalar_subquery()))
+
+class PostStats(db.Model):
+    """Per-post read counters, written in batches by view_stats rather than once per page view."""
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), primary_key=True)
+    view_count = db.Column(db.Integer, default=0, nullable=False)
+    unique_viewers = db.Column(db.Integer, default=0, nullable=False, index=True)  # Estimate from viewer_sketch, for ranking
+    viewer_sketch = db.Column(db.LargeBinary, nullable=False)  # HyperLogLog registers (view_stats.REGISTERS bytes)
+
+def _bump_stats(connection, user_id, **deltas):
+    """Apply counter deltas to a user's UserStats row from inside a flush."""
+    stats = UserStats.__table__
+    connection.execute(update(stats).where(stats.c.user_id == user_id)
+                       .values({name: stats.c[name] + delta for name, delta in deltas.items()}))
+
+def _post_author(connection, post_id):
+    return connection.execute(select(Post.__table__.c.user_id).where(Post.__table__.c.id == post_id)).scalar()
+
+@db.event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    connection.execute(UserStats.__table__.insert().values(user_id=target.id, joined_at=datetime.now(timezone.utc)))
+
+@db.event.listens_for(Post, 'after_insert')
+def _post_inserted(mapper, connection, target):
+    _bump_stats(connection, target.user_id, post_count=1)
+
+@db.event.listens_for(Post, 'after_delete')
+def _post_deleted(mapper, connection, target):
+    _bump_stats(connection, target.user_id, post_count=-1)
+
+@db.event.listens_for(Vote, 'after_insert')
+def _vote_inserted(mapper, connection, target):
+    _bump_stats(connection, _post_author(connection, target.post_id), karma=target.value)
+
+@db.event.listens_for(Vote, 'after_update')
+def _vote_updated(mapper, connection, target):
+    old = db.inspect(target).attrs.value.history.deleted
+    if old:
+        _bump_stats(connection, _post_author(connection, target.post_id), karma=target.value - old[0])
+
+@db.event.listens_for(Vote, 'after_delete')
+def _vote_deleted(mapper, connection, target):
+    _bump_stats(connection, _post_author(connection, target.post_id), karma=-target.value)
 
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -68,18 +233,77 @@ class Notification(db.Model):
     message = db.Column(db.String(200), nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Fixed
     is_read = db.Column(db.Boolean, default=False)
+    event_count = db.Column(db.Integer, default=1, nullable=False)  # New: Comments coalesced into this row
     user = db.relationship('User', backref=db.backref('notifications', lazy=True))
     post = db.relationship('Post', backref=db.backref('notifications', lazy=True))
     comment = db.relationship('Comment')
+    __table_args__ = (db.Index('ix_notification_user_post', 'user_id', 'post_id'), NEVER_REUSE_IDS)
 
-class Flag(db.Model):
+class Subscription(db.Model):
+    """User follows a post's comments (authors and commenters are subscribed automatically)."""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    __table_args__ = (db.UniqueConstraint('user_id', 'post_id', name='unique_subscription'),)
+
+class Follow(db.Model):
+    """follower follows either a user or a category (exactly one of the two)."""
+    id = db.Column(db.Integer, primary_key=True)
+    follower_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    followed_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True, index=True)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    __table_args__ = (db.CheckConstraint('(followed_user_id IS NULL) != (category_id IS NULL)', name='follow_target'),
+                      db.UniqueConstraint('follower_id', 'followed_user_id', name='unique_user_follow'),
+                      db.UniqueConstraint('follower_id', 'category_id', name='unique_category_follow'))
+
+class TimelineEntry(db.Model):
+    """Materialized home feed: one row per (reader, post). The primary key doubles as the feed's range index."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), primary_key=True)
+    __table_args__ = (db.Index('ix_timeline_post', 'post_id'),)  # Post deletes and archiving remove rows by post_id
+
+class Flag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # New: NULL for system flags (duplicates)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=True)
     comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True)
     reason = db.Column(db.String(200), nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Fixed
     user = db.relationship('User', backref=db.backref('flags', lazy=True))
-    __table_args__ = (db.CheckConstraint('post_id IS NOT NULL OR comment_id IS NOT NULL', name='flag_target'),)  # One or the other
+    __table_args__ = (db.CheckConstraint('post_id IS NOT NULL OR comment_id IS NOT NULL', name='flag_target'),  # One or the other
+                      db.UniqueConstraint('user_id', 'post_id', name='unique_post_flag'),  # New: One flag per user per target
+                      db.UniqueConstraint('user_id', 'comment_id', name='unique_comment_flag'))
     def __repr__(self):
-        return f'<Flag {self.reason} by User {self.user_id}>'
\ No newline at end of file
+        return f'<Flag {self.reason} by User {self.user_id}>'
+# New: Cold storage for archive.py. Same columns as the hot tables (ids kept), but only the foreign keys to users
+# and categories, which are never archived; indexes cover just what the read-only post page needs.
+def _archive_table(name, model, *indexes):
+    columns = [db.Column(c.name, c.type, *[db.ForeignKey(fk.target_fullname) for fk in c.foreign_keys
+                                           if fk.column.table.name in ('user', 'category')],
+                         primary_key=c.primary_key, nullable=c.nullable)
+               for c in model.__table__.columns]
+    return db.Table(name, *columns, *indexes)
+
+class ArchivedPost(db.Model):
+    __table__ = _archive_table('archived_post', Post)
+    user = db.relationship('User')
+    category = db.relationship('Category')
+    @property
+    def score(self):
+        return db.session.scalar(select(func.coalesce(func.sum(ArchivedVote.value), 0))
+                                 .where(ArchivedVote.post_id == self.id))
+
+class ArchivedComment(db.Model):
+    __table__ = _archive_table('archived_comment', Comment, db.Index('ix_archived_comment_post_path', 'post_id', 'path'))
+    user = db.relationship('User')
+
+class ArchivedVote(db.Model):
+    __table__ = _archive_table('archived_vote', Vote, db.Index('ix_archived_vote_post', 'post_id', 'value'))
+
+class ArchivedPostStats(db.Model):
+    __table__ = _archive_table('archived_post_stats', PostStats)
+
+class ArchivedNotification(db.Model):
+    __table__ = _archive_table('archived_notification', Notification, db.Index('ix_archived_notification_user', 'user_id'))
@@ -0,0 +1,107 @@
+from flask import current_app
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Flag, Post, Comment
+from tasks import tasks
+import feed_cache
+import suggest
+
+TARGETS = {'post': (Post, Flag.post_id), 'comment': (Comment, Flag.comment_id)}
+
+def flag_total():
+    """What a target's flag count means everywhere (counter, worker recount, admin queue): its Flag rows.
+
+    The unique constraints allow one flag per user, so this counts reporters; a system flag (near-duplicate
+    detection) counts as one more.
+    """
+    return func.count(Flag.id)
+
+def flag_target(kind, target_id, user_id, reason):
+    """Record a flag and bump the target's counter; returns False if this user already flagged it."""
+    model, fk_column = TARGETS[kind]
+    db.session.add(Flag(user_id=user_id, reason=reason, **{fk_column.key: target_id}))
+    try:
+        db.session.flush()
+    except IntegrityError:  # unique_post_flag / unique_comment_flag
+        db.session.rollback()
+        return False
+    db.session.execute(update(model).where(model.id == target_id).values(flag_count=model.flag_count + 1))
+    flag_count, hidden = db.session.execute(select(model.flag_count, model.hidden).where(model.id == target_id)).one()
+    db.session.commit()
+
+    # Counter crossed the threshold: leave the authoritative recount and hiding to the worker
+    if flag_count >= current_app.config['FLAG_HIDE_THRESHOLD'] and not hidden:
+        tasks.enqueue(current_app._get_current_object(), review_target, kind, target_id)
+    return True
+
+def review_target(kind, target_id):
+    """Background check: recount the flags, resync the counter and hide past the threshold."""
+    model, fk_column = TARGETS[kind]
+    flags = db.session.scalar(select(flag_total()).where(fk_column == target_id))
+    hidden = flags >= current_app.config['FLAG_HIDE_THRESHOLD']
+    db.session.execute(update(model).where(model.id == target_id).values(flag_count=flags, hidden=hidden))
+    db.session.commit()
+    if hidden and kind == 'post':
+        category_id, title = db.session.execute(select(Post.category_id, Post.title).where(Post.id == target_id)).one()
+        feed_cache.posts_removed([(target_id, category_id)])
+        suggest.removed('post', target_id, title)
+    if hidden:
+        current_app.logger.info(f'Auto-hid {kind} {target_id} after {flags} flags')
+
+def upgrade_schema():
+    """Add the flag counters and the one-flag-per-user rule to a database created before them; returns the steps.
+
+    db.create_all() skips existing tables, so `flask init-db` runs this explicitly. Each step checks the live schema
+    first, which makes it a no-op on an up-to-date database:
+      - duplicate flags are dropped, keeping each user's first, before unique_post_flag/unique_comment_flag are added
+        (a unique index on SQLite, which can't add constraints to a table);
+      - post and comment get flag_count and hidden (plus its index), backfilled from the flags, with targets already
+        at FLAG_HIDE_THRESHOLD hidden as the worker would have.
+    """
+    steps = []
+    conn = db.session.connection()
+    schema = inspect(conn)
+    existing = ({c['name'] for c in schema.get_unique_constraints('flag')}
+                | {i['name'] for i in schema.get_indexes('flag') if i['unique']})
+    for name, fk_column in (('unique_post_flag', Flag.post_id), ('unique_comment_flag', Flag.comment_id)):
+        if name in existing:
+            continue
+        first = select(func.min(Flag.id)).where(Flag.user_id.isnot(None), fk_column.isnot(None)).group_by(
+            Flag.user_id, fk_column)
+        db.session.execute(delete(Flag).where(Flag.user_id.isnot(None), fk_column.isnot(None), Flag.id.not_in(first)))
+        if conn.dialect.name == 'sqlite':
+            db.session.execute(text(f'CREATE UNIQUE INDEX {name} ON flag (user_id, {fk_column.key})'))
+        else:
+            db.session.execute(text(f'ALTER TABLE flag ADD CONSTRAINT {name} UNIQUE (user_id, {fk_column.key})'))
+        steps.append(f'flag: added {name}')
+
+    for kind, (model, fk_column) in TARGETS.items():
+        table = model.__table__
+        columns = {c['name'] for c in schema.get_columns(table.name)}
+        if {'flag_count', 'hidden'} <= columns:
+            continue
+        if 'flag_count' not in columns:
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN flag_count INTEGER NOT NULL DEFAULT 0'))
+        if 'hidden' not in columns:
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN hidden BOOLEAN NOT NULL DEFAULT FALSE'))
+            for index in table.indexes:
+                if 'hidden' in index.columns:
+                    index.create(conn)
+        db.session.execute(update(model).values(
+            flag_count=select(flag_total()).where(fk_column == model.id).scalar_subquery()))
+        db.session.execute(update(model).where(model.flag_count >= current_app.config['FLAG_HIDE_THRESHOLD'])
+                           .values(hidden=True))
+        steps.append(f'{table.name}: added flag_count and hidden, backfilled from flags')
+    db.session.commit()
+    return steps
+
+def clear_flags(kind, target_ids):
+    """Drop all flags on the targets and unhide them (caller commits)."""
+    model, fk_column = TARGETS[kind]
+    Flag.query.filter(fk_column.in_(target_ids)).delete(synchronize_session=False)
+    db.session.execute(update(model).where(model.id.in_(target_ids)).values(flag_count=0, hidden=False))
+    if kind == 'post':
+        restored = db.session.execute(select(Post.id, Post.category_id, Post.title).where(Post.id.in_(target_ids))).all()
+        feed_cache.posts_restored({category_id for _, category_id, _ in restored})
+        for post_id, _, title in restored:
+            suggest.added('post', post_id, title)
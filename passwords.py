@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+def init_app(app):
+    # Hashing is deliberately CPU-heavy; a small dedicated pool caps how many cores a login storm can take
+    app.extensions['passwords'] = ThreadPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'],
+                                                     thread_name_prefix='pwhash')
+
+def _run(fn, *args, **kwargs):
+    return current_app.extensions['passwords'].submit(fn, *args, **kwargs).result()
+
+def hash_password(password):
+    return _run(generate_password_hash, password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    """Werkzeug expands defaults ('scrypt' -> 'scrypt:32768:8:1'), so derive the stored prefix from a real hash."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def needs_rehash(pwhash):
+    """True if pwhash was made with different parameters than PASSWORD_HASH_METHOD."""
+    return pwhash.split('$', 1)[0] != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
@@ -0,0 +1,66 @@
+import time
+from functools import lru_cache
+from flask import current_app, request, session, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
+from cache import make_cache
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+@lru_cache(maxsize=None)
+def parse_limit(spec):
+    """'30/minute' -> (30, 60): bucket capacity and the seconds it takes to refill completely."""
+    count, period = spec.split('/')
+    return int(count), PERIODS[period.strip()]
+
+def take_token(storage, key, capacity, period, now=None):
+    """Token bucket: spend one token for key; returns 0 if allowed, else seconds until a token frees up."""
+    now = time.time() if now is None else now
+    retry_after = 0
+
+    def _take(state):
+        nonlocal retry_after
+        tokens, last = state if state else (capacity, now)
+        tokens = min(capacity, tokens + (now - last) * capacity / period)
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) * period / capacity
+        return [tokens, now]
+
+    storage.update(key, _take, ttl=period)  # A bucket idle for a full period is full again, so it can expire
+    return retry_after
+
+def forwarded_environ(app, environ):
+    """Apply the app's X-Forwarded-* handling to an environ built outside the WSGI stack (the ASGI endpoints)."""
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    return ProxyFix(lambda env, _: env, x_for=hops, x_proto=hops)(environ, None) if hops else environ
+
+class RateLimiter:
+    """Per-user (or per-IP when anonymous) token buckets for write endpoints, checked before the view runs."""
+
+    def init_app(self, app):
+        app.extensions['ratelimit'] = make_cache(app.config['RATELIMIT_STORAGE'])
+        hops = app.config['TRUSTED_PROXY_HOPS']
+        if hops:  # Behind a router, remote_addr is the proxy: every anonymous client would share one bucket
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+        app.before_request(self.check)
+
+    def check(self, endpoint=None):
+        """429 response if the caller is over endpoint's limit (default: the matched Flask endpoint), else None."""
+        config = current_app.config
+        endpoint = endpoint or request.endpoint
+        spec = config['RATELIMITS'].get(endpoint)
+        if not config['RATELIMIT_ENABLED'] or not spec or request.method != 'POST':
+            return None
+        # Read Flask-Login's session key directly: identifying the caller must not cost a DB query
+        user_id = session.get('_user_id')
+        ident = f'user:{user_id}' if user_id else f'ip:{request.remote_addr}'
+        retry_after = take_token(current_app.extensions['ratelimit'], f'{endpoint}:{ident}', *parse_limit(spec))
+        if not retry_after:
+            return None
+        headers = {'Retry-After': str(int(retry_after) + 1)}
+        if request.is_json:
+            return jsonify({'success': False, 'error': 'Too many requests'}), 429, headers
+        return 'Too many requests - slow down!', 429, headers
+
+limiter = RateLimiter()
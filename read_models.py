@@ -0,0 +1,35 @@
+"""Column-only queries for rendering lists: compact tuples instead of tracked ORM objects.
+
+Templates only read a handful of attributes per post, so the feed, search, category, profile and home views
+select exactly those columns (score included, as a correlated sum) and skip the identity map, change tracking
+and relationship loading that full Post/User/Vote instances carry.
+"""
+from collections import namedtuple
+from sqlalchemy import func, select
+from models import db, User, Category, Post, PostStats, Vote
+
+PostRow = namedtuple('PostRow', ['id', 'title', 'image_path', 'timestamp', 'comment_count', 'author', 'category', 'score',
+                                 'views'])
+CategoryRow = namedtuple('CategoryRow', ['id', 'name', 'slug'])
+
+def _score():
+    return (select(func.coalesce(func.sum(Vote.value), 0)).where(Vote.post_id == Post.id)
+            .correlate(Post).scalar_subquery())
+
+def post_rows(*criteria, order_by=None, limit=None):
+    """Visible posts matching criteria as PostRows, newest first unless order_by says otherwise.
+
+    Ranked feeds can order by flushed view counters, e.g. order_by=PostStats.unique_viewers.desc().
+    """
+    stmt = (select(Post.id, Post.title, Post.image_path, Post.timestamp, Post.comment_count,
+                   User.username, Category.name, _score(), func.coalesce(PostStats.view_count, 0))
+            .join(User, Post.user_id == User.id).join(Category, Post.category_id == Category.id)
+            .outerjoin(PostStats, PostStats.post_id == Post.id)
+            .where(Post.hidden.is_(False), *criteria)
+            .order_by(order_by if order_by is not None else Post.timestamp.desc()))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [PostRow._make(row) for row in db.session.execute(stmt)]
+
+def category_rows():
+    return [CategoryRow._make(row) for row in db.session.execute(select(Category.id, Category.name, Category.slug))]
@@ -0,0 +1,65 @@
+import random
+import sqlite3
+import time
+from flask import current_app, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+STICKY_KEY = '_primary_until'  # Flask session key: reads stay on the primary until this timestamp
+SAFE_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    """db.session that reads from a replica during safe (GET/HEAD) requests and uses the primary otherwise.
+
+    Flushes and bulk UPDATE/DELETE always go to the primary. Once a request has written, the rest of it reads
+    from the primary too, and the user's next few requests stick to it (read-your-writes).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.info['wrote'] = True
+            return engine
+        if bind is not None or engine is not self._db.engines.get(None) or not self._can_use_replica(clause):
+            return engine
+        return self._db.engines[random.choice(current_app.extensions['replicas'])]
+
+    def _can_use_replica(self, clause):
+        if not current_app.extensions.get('replicas') or self.info.get('wrote') or not has_request_context():
+            return False  # CLI commands and background tasks always see the primary
+        if clause is not None and not getattr(clause, 'is_select', False):
+            return False  # Raw SQL may write
+        return request.method in SAFE_METHODS and session.get(STICKY_KEY, 0) <= time.time()
+
+def init_app(app, db):
+    """Register DATABASE_REPLICA_URIS as binds; must run before db.init_app creates the engines."""
+    keys = [f'replica{i}' for i in range(len(app.config['DATABASE_REPLICA_URIS']))]
+    app.config['SQLALCHEMY_BINDS'] = {**app.config.get('SQLALCHEMY_BINDS', {}),
+                                      **dict(zip(keys, app.config['DATABASE_REPLICA_URIS']))}
+    app.extensions['replicas'] = keys
+
+    @app.after_request
+    def stick_to_primary(response):
+        if keys and db.session.info.pop('wrote', False):
+            session[STICKY_KEY] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+    @app.cli.command('sync-replicas')
+    def sync_replicas_command():
+        """Copy the primary into every SQLite replica (local stand-in for real replication)."""
+        primary = db.engines[None]
+        for key in keys:
+            replica = db.engines[key]
+            if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+                print(f'{key}: not SQLite, skipped (use the database\'s own replication)')
+                continue
+            sync_sqlite(primary.url.database, replica.url.database)
+            print(f'{key}: synced from primary')
+
+def sync_sqlite(primary_path, replica_path):
+    """Online copy via SQLite's backup API: consistent even while the primary is being written."""
+    source, target = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
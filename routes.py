@@ -1,11 +1,81 @@
-from flask import request, render_template_string, redirect, url_for, flash, jsonify, send_from_directory
+from flask import current_app, request, render_template_string, redirect, url_for, flash, jsonify, send_from_directory
 from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
-from models import db, User, Category, Post, Comment, Vote, Notification, Flag
+from models import db, User, Category, Post, Comment, Vote, Notification, Flag, UserStats, ArchivedPost, ArchivedComment
 from utils import allowed_file
+from auth import invalidate_session_user
+from subscriptions import is_subscribed, subscribe, unsubscribe, notify_comment
+from similarity import find_duplicate
+from read_models import post_rows, category_rows
+import feed_cache
+import suggest
+import view_stats
+from moderation import flag_target
+from timelines import is_following, follow, unfollow, fan_out_post, home_timeline
+from tasks import tasks
 from templates import INDEX_TEMPLATE, PROFILE_TEMPLATE, NOTIFICATIONS_TEMPLATE, SINGLE_POST_TEMPLATE
 from werkzeug.utils import secure_filename
+import math
 import os
+import time
+
+def posts_since(since_id, limit=20):
+    """Visible posts newer than since_id as JSON-ready dicts, newest first (feed updates / long-polling)."""
+    posts = post_rows(Post.id > since_id, order_by=Post.id.desc(), limit=limit)
+    return [{'id': p.id, 'title': p.title, 'author': p.author, 'category': p.category,
+             'image_path': p.image_path, 'comment_count': p.comment_count, 'timestamp': p.timestamp.isoformat()}
+            for p in posts]
+
+def longpoll_wait(raw, cap):
+    """Seconds a long-poll may wait: ?wait= clamped to [0, cap]; NaN, infinities and junk mean no wait."""
+    try:
+        wait = float(raw or 0)
+    except ValueError:
+        return 0.0
+    return max(0.0, min(wait, cap)) if math.isfinite(wait) else 0.0
+
+def upload_filename(original):
+    return secure_filename(f'post_{Post.query.count()}_{original}')
+
+def upload_path(filename):
+    """Where an upload is written; the folder is created on first upload instead of at startup."""
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+
+def create_post(user_id, title, category_id, image_path=None):
+    """Insert and commit a post; the one write path shared by the feed form and the async API.
+
+    Returns None if the title near-duplicates a recent post and DUPLICATE_ACTION is 'reject'.
+    """
+    fingerprint, duplicate_of = find_duplicate('post', title)
+    if duplicate_of and current_app.config['DUPLICATE_ACTION'] == 'reject':
+        return None
+    post = Post(title=title, image_path=image_path, user_id=user_id, category_id=category_id, simhash=fingerprint)
+    db.session.add(post)
+    db.session.flush()
+    subscribe(user_id, post.id)  # Authors follow their own threads
+    db.session.commit()
+    feed_cache.post_added(post.id, category_id)
+    suggest.added('post', post.id, title)
+    tasks.enqueue(current_app._get_current_object(), fan_out_post, post.id)  # Followers' home timelines
+    if duplicate_of:
+        flag_target('post', post.id, None, f'Near-duplicate of post #{duplicate_of}')
+    return post
+
+def feed_page(category_id=None):
+    """(rows, next_before) for one page of the global or a category feed, newest first, paged by ?before=<id>.
+
+    Page one, where nearly all traffic lands, takes its ids from feed_cache and only looks those rows up by key.
+    """
+    page_size = current_app.config['FEED_PAGE_SIZE']
+    before = request.args.get('before', type=int)
+    if before:
+        criteria = [Post.id < before] + ([Post.category_id == category_id] if category_id else [])
+        rows = post_rows(*criteria, order_by=Post.id.desc(), limit=page_size + 1)
+        return rows[:page_size], rows[page_size - 1].id if len(rows) > page_size else None
+    ids = feed_cache.first_page_ids(category_id)
+    rows = post_rows(Post.id.in_(ids[:page_size]), order_by=Post.id.desc()) if ids else []
+    return rows, ids[page_size - 1] if len(ids) > page_size else None
 
 def main_routes(app):
     @app.route('/', methods=['GET', 'POST'])
@@ -19,51 +89,123 @@ def main_routes(app):
             if 'image' in request.files:
                 file = request.files['image']
                 if file.filename and allowed_file(file.filename):
-                    filename = secure_filename(f'post_{Post.query.count()}_{file.filename}')
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                    filename = upload_filename(file.filename)
+                    filepath = upload_path(filename)
                     file.save(filepath)
                     image_path = f"/uploads/{filename}"
             
             if title and category_id:
-                post = Post(title=title, image_path=image_path, user_id=current_user.id, category_id=category_id)
-                db.session.add(post)
-                db.session.commit()
+                if create_post(current_user.id, title, category_id, image_path) is None:
+                    if image_path:
+                        os.remove(filepath)
+                    flash('That looks like a duplicate of a recent post.')
         
-        posts = Post.query.options(joinedload(Post.votes)).order_by(Post.timestamp.desc()).all()
-        categories = Category.query.all()
-        return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=None, cat_id=None, cat_name=None)
+        posts, next_before = feed_page()
+        categories = category_rows()
+        return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=None, cat_id=None, cat_name=None,
+                                      next_before=next_before)
+
+    @app.route('/home')
+    @login_required
+    def home():
+        """Personalized feed: own posts plus followed users and categories, paged by ?before=<post id>."""
+        posts, next_before = home_timeline(current_user.id, request.args.get('before', type=int),
+                                           app.config['HOME_PAGE_SIZE'])
+        categories = category_rows()
+        return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=None, cat_id=None,
+                                      cat_name=None, home=True, next_before=next_before)
+
+    @app.route('/follow/<kind>/<int:target_id>', methods=['POST'])
+    @login_required
+    def toggle_follow(kind, target_id):
+        target = db.session.get(User if kind == 'user' else Category, target_id) if kind in ('user', 'category') else None
+        if target is None or (kind == 'user' and target_id == current_user.id):
+            flash('Nothing to follow there!')
+            return redirect(url_for('index'))
+        if is_following(current_user.id, kind, target_id):
+            unfollow(current_user.id, kind, target_id)
+        else:
+            follow(current_user.id, kind, target_id)
+        db.session.commit()
+        if kind == 'user':
+            return redirect(url_for('profile', username=target.username))
+        return redirect(url_for('category', slug=target.slug))
+
+    @app.route('/search/suggest')
+    @login_required
+    def search_suggest():
+        """Search-as-you-type: prefix matches over category names, usernames and post titles, from memory."""
+        q = request.args.get('q', '').strip()
+        suggestions = []
+        if len(q) >= app.config['SUGGEST_MIN_CHARS']:
+            for kind, label, ref in suggest.get_index().search(q, app.config['SUGGEST_LIMIT']):
+                url = {'category': f'/category/{ref}', 'user': f'/profile/{ref}', 'post': f'/post/{ref}'}[kind]
+                suggestions.append({'type': kind, 'label': label, 'url': url})
+        response = jsonify({'q': q, 'suggestions': suggestions})
+        # Browsers reuse answers for prefixes typed again (backspacing, retyping) instead of asking per keystroke
+        response.headers['Cache-Control'] = f"private, max-age={app.config['SUGGEST_CACHE_SECONDS']}"
+        return response
 
     @app.route('/search')
     @login_required
     def search():
         query = request.args.get('q', '').strip()
         cat_id = request.args.get('cat_id', type=int)
-        categories = Category.query.all()
+        categories = category_rows()
         
-        q = Post.query
+        criteria = []  # post_rows already leaves out auto-hidden posts
         if query:
-            q = q.filter(Post.title.ilike(f'%{query}%'))
+            criteria.append(Post.title.ilike(f'%{query}%'))
         if cat_id:
-            q = q.filter_by(category_id=cat_id)
-        posts = q.options(joinedload(Post.votes)).order_by(Post.timestamp.desc()).all()
+            criteria.append(Post.category_id == cat_id)
+        posts = post_rows(*criteria)
         
-        cat_name = Category.query.get(cat_id).name if cat_id else None
+        cat_name = next((c.name for c in categories if c.id == cat_id), None)
         return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=query, cat_id=cat_id, cat_name=cat_name)
 
     @app.route('/category/<slug>')
     @login_required
     def category(slug):
         cat = Category.query.filter_by(slug=slug).first_or_404()
-        posts = Post.query.filter_by(category_id=cat.id).options(joinedload(Post.votes)).order_by(Post.timestamp.desc()).all()
-        categories = Category.query.all()
-        return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=None, cat_id=cat.id, cat_name=cat.name)
+        posts, next_before = feed_page(cat.id)
+        categories = category_rows()
+        return render_template_string(INDEX_TEMPLATE, posts=posts, categories=categories, query=None, cat_id=cat.id, cat_name=cat.name,
+                                      following=is_following(current_user.id, 'category', cat.id), next_before=next_before)
+
+    @app.route('/feed/updates')
+    @login_required
+    def feed_updates():
+        """Long-poll for posts newer than ?since=<id>, waiting up to ?wait= seconds. Holds this thread while waiting,
+        so the wait is capped at LONGPOLL_SYNC_MAX_SECONDS; long waits belong on the ASGI endpoint."""
+        since = request.args.get('since', 0, type=int)
+        deadline = time.monotonic() + longpoll_wait(request.args.get('wait'), app.config['LONGPOLL_SYNC_MAX_SECONDS'])
+        while True:
+            posts = posts_since(since)
+            if posts or time.monotonic() >= deadline:
+                return jsonify({'posts': posts})
+            db.session.rollback()  # End the read transaction so the next poll sees new commits
+            time.sleep(app.config['LONGPOLL_INTERVAL'])
 
     @app.route('/profile/<username>')
     @login_required
     def profile(username):
         user = db.session.query(User).filter_by(username=username).first_or_404()
-        posts = Post.query.filter_by(user_id=user.id).options(joinedload(Post.comments), joinedload(Post.votes)).all()
-        return render_template_string(PROFILE_TEMPLATE, user=user, posts=posts)
+        stats = db.session.get(UserStats, user.id)
+        if stats is None:  # User from before the summary table: build their row once
+            UserStats.recount([user.id])
+            db.session.commit()
+            stats = db.session.get(UserStats, user.id)
+        # Keyset page of posts: cost depends on the page size, not on how much the user has posted
+        page_size = app.config['PROFILE_PAGE_SIZE']
+        criteria = [Post.user_id == user.id]
+        before = request.args.get('before', type=int)
+        if before:
+            criteria.append(Post.id < before)
+        posts = post_rows(*criteria, order_by=Post.id.desc(), limit=page_size + 1)
+        next_before = posts[page_size - 1].id if len(posts) > page_size else None
+        posts = posts[:page_size]
+        return render_template_string(PROFILE_TEMPLATE, user=user, stats=stats, posts=posts,
+                                      next_before=next_before, following=is_following(current_user.id, 'user', user.id))
 
     @app.route('/profile/<username>/edit', methods=['POST'])
     @login_required
@@ -90,6 +232,7 @@ def main_routes(app):
         for n in notifs:
             n.is_read = True
         db.session.commit()
+        invalidate_session_user(current_user.id)  # Bell badge count changed
         return render_template_string(NOTIFICATIONS_TEMPLATE, notifications=notifs)
 
     @app.route('/vote/<int:post_id>', methods=['POST'])
@@ -116,28 +259,94 @@ def main_routes(app):
     @app.route('/comment/<int:post_id>', methods=['POST'])
     @login_required
     def comment(post_id):
+        post = db.get_or_404(Post, post_id)  # Archived or bad ids: no orphan comments
         text = request.form.get('comment', '').strip()
+        parent_id = request.form.get('parent_id', type=int)  # New: Set when replying to a comment
+        if parent_id:
+            parent = db.get_or_404(Comment, parent_id)
+            if parent.post_id != post.id:  # A reply's path must stay inside its own post's thread
+                flash('Comment not found!')
+                return redirect(url_for('single_post', post_id=post_id))
+            max_depth = app.config['COMMENT_MAX_REPLY_DEPTH']
+            if parent.depth >= max_depth:  # Flatten: reply to the ancestor on the deepest allowed level instead
+                parent_id = int(parent.path.split('.')[max_depth - 1])
         if text:
-            comment = Comment(text=text, user_id=current_user.id, post_id=post_id)
+            fingerprint, duplicate_of = find_duplicate('comment', text)
+            if duplicate_of and app.config['DUPLICATE_ACTION'] == 'reject':
+                flash('That looks like a duplicate of a recent comment.')
+                return redirect(url_for('single_post', post_id=post_id))
+            comment = Comment(text=text, user_id=current_user.id, post_id=post_id, parent_id=parent_id, simhash=fingerprint)
             db.session.add(comment)
-            db.session.commit()
-            # Create notification
-            post = db.session.get(Post, post_id)
-            if post.user_id != current_user.id:
-                notif = Notification(user_id=post.user_id, post_id=post_id, comment_id=comment.id, message=f"New comment by {current_user.username} on your post '{post.title}'")
-                db.session.add(notif)
-                db.session.commit()
+            db.session.flush()
+            notify_comment(post_id, comment.id, current_user.id)  # Subscribes the commenter; one commit for it all
+            if duplicate_of:
+                flag_target('comment', comment.id, None, f'Near-duplicate of comment #{duplicate_of}')
+        if parent_id:
+            return redirect(url_for('single_post', post_id=post_id))
         return redirect(url_for('index'))
 
+    def _find_post(post_id):
+        """(post, comment model) for a live or archived post, or (None, None)."""
+        post = db.session.get(Post, post_id)
+        if post:
+            return post, Comment
+        archived = db.session.get(ArchivedPost, post_id)  # Hot tables miss first: archived posts stay readable
+        return (archived, ArchivedComment) if archived else (None, None)
+
+    def _render_thread(post, root=None, views=None, model=Comment):
+        """One page of a post's thread (or of root's subtree) in display order, with authors eager-loaded."""
+        base_depth = root.depth if root else 0
+        max_depth = base_depth + app.config['COMMENT_MAX_DEPTH']
+        page_size = app.config['COMMENT_PAGE_SIZE']
+        q = model.query.options(joinedload(model.user)).filter(model.post_id == post.id, model.depth <= max_depth)
+        if root:
+            q = q.filter(model.path >= root.path, model.path < Comment.subtree_end(root.path))
+        after = request.args.get('after')  # Keyset cursor: path of the last comment shown
+        if after:
+            q = q.filter(model.path > after)
+        comments = q.order_by(model.path).limit(page_size + 1).all()
+        next_after = comments[page_size - 1].path if len(comments) > page_size else None
+        return render_template_string(SINGLE_POST_TEMPLATE, post=post, comments=comments[:page_size], root=root,
+                                      base_depth=base_depth, max_depth=max_depth, next_after=next_after,
+                                      subscribed=is_subscribed(current_user.id, post.id), views=views,
+                                      archived=model is ArchivedComment)
+
     @app.route('/post/<int:post_id>')
     @login_required
     def single_post(post_id):
-        post = db.session.get(Post, post_id)
-        if not post:
+        post, model = _find_post(post_id)
+        if not post or (post.hidden and not current_user.is_admin):
             flash('Post not found!')
             return redirect(url_for('index'))
-        post.comments = post.comments  # Load comments
-        return render_template_string(SINGLE_POST_TEMPLATE, post=post)
+        if model is ArchivedComment:
+            return _render_thread(post, model=model)
+        view_stats.record_view(post.id, current_user.id)  # Buffered: no write on the request path
+        return _render_thread(post, views=view_stats.post_counts(post.id))
+
+    @app.route('/post/<int:post_id>/thread/<int:comment_id>')
+    @login_required
+    def comment_thread(post_id, comment_id):
+        post, model = _find_post(post_id)
+        root = db.session.get(model, comment_id) if post else None
+        if not post or not root or root.post_id != post.id or (post.hidden and not current_user.is_admin):
+            flash('Comment not found!')
+            return redirect(url_for('index'))
+        return _render_thread(post, root, model=model)
+
+    @app.route('/subscribe/<int:post_id>', methods=['POST'])
+    @login_required
+    def toggle_subscription(post_id):
+        if not db.session.get(Post, post_id):
+            flash('Post not found!')
+            return redirect(url_for('index'))
+        if is_subscribed(current_user.id, post_id):
+            unsubscribe(current_user.id, post_id)
+            flash('Unsubscribed from this post.')
+        else:
+            subscribe(current_user.id, post_id)
+            flash('Subscribed! You will be notified of new comments.')
+        db.session.commit()
+        return redirect(url_for('single_post', post_id=post_id))
 
     @app.route('/uploads/<filename>')
     def uploaded_file(filename):
@@ -0,0 +1,96 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import select
+from models import db, Post, Comment
+
+BITS = 64
+BANDS = 4  # 16-bit bands: fingerprints within 3 bits of each other always share at least one band
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+MASK = (1 << BITS) - 1
+WORD = re.compile(r'\w+')
+
+def simhash(text):
+    """64-bit SimHash of text's words and word pairs, or None if it is too short to fingerprint meaningfully."""
+    words = WORD.findall(text.lower())
+    if len(words) < current_app.config['DUPLICATE_MIN_WORDS']:
+        return None  # "Thanks!" and "+1" are legitimately repeated
+    weights = [0] * BITS
+    for feat in words + [f'{a} {b}' for a, b in zip(words, words[1:])]:
+        # blake2b rather than hash(): fingerprints are stored, so they must not vary per process
+        h = int.from_bytes(hashlib.blake2b(feat.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def to_db(fingerprint):
+    """Unsigned 64-bit -> signed, to fit a BIGINT/SQLite INTEGER column."""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+def _bands(fingerprint):
+    return [(band, fingerprint >> (band * BAND_BITS) & BAND_MASK) for band in range(BANDS)]
+
+class SimilarityIndex:
+    """LSH over the SimHash of the most recent `window` items of one model, kept in memory per process.
+
+    Fingerprints live in the model's simhash column; before each lookup the index pulls in rows newer than the
+    last one it has seen (one primary-key range query), so items created by other workers are found too.
+    """
+
+    def __init__(self, model, window):
+        self.model = model
+        self.window = window
+        self.fingerprints = OrderedDict()  # id -> fingerprint, oldest first
+        self.buckets = {}  # (band, band value) -> ids
+        self.high_water = None
+        self._lock = threading.Lock()
+
+    def _add(self, item_id, fingerprint):
+        self.fingerprints[item_id] = fingerprint
+        for key in _bands(fingerprint):
+            self.buckets.setdefault(key, set()).add(item_id)
+        if len(self.fingerprints) > self.window:
+            old_id, old = self.fingerprints.popitem(last=False)
+            for key in _bands(old):
+                self.buckets[key].discard(old_id)
+                if not self.buckets[key]:
+                    del self.buckets[key]
+
+    def _catch_up(self):
+        model = self.model
+        q = select(model.id, model.simhash).where(model.simhash.isnot(None))
+        if self.high_water is None:  # Warm-up: the newest `window` items
+            rows = db.session.execute(q.order_by(model.id.desc()).limit(self.window)).all()[::-1]
+        else:
+            rows = db.session.execute(q.where(model.id > self.high_water).order_by(model.id)).all()
+        for item_id, fingerprint in rows:
+            self._add(item_id, fingerprint & MASK)
+        if rows or self.high_water is None:
+            self.high_water = rows[-1][0] if rows else 0
+
+    def find(self, fingerprint):
+        """Id of a recent item within DUPLICATE_MAX_DISTANCE bits of fingerprint, else None."""
+        max_distance = current_app.config['DUPLICATE_MAX_DISTANCE']
+        with self._lock:
+            self._catch_up()
+            candidates = set()
+            for key in _bands(fingerprint):
+                candidates |= self.buckets.get(key, set())
+            for item_id in sorted(candidates, reverse=True):  # Newest match first
+                if (self.fingerprints[item_id] ^ fingerprint).bit_count() <= max_distance:
+                    return item_id
+        return None
+
+def init_app(app):
+    window = app.config['DUPLICATE_WINDOW']
+    app.extensions['similarity'] = {'post': SimilarityIndex(Post, window), 'comment': SimilarityIndex(Comment, window)}
+
+def find_duplicate(kind, text):
+    """(fingerprint for the new item's simhash column, id of a near-duplicate recent `kind` or None)."""
+    fingerprint = simhash(text)
+    if fingerprint is None:
+        return None, None
+    return to_db(fingerprint), current_app.extensions['similarity'][kind].find(fingerprint)
@@ -0,0 +1,74 @@
+// Shared page scripts: voting, sharing and search suggestions.
+function vote(event, postId, value) {
+    event.preventDefault();
+    event.stopPropagation();
+    const scoreEl = document.getElementById('score-' + postId);
+    fetch('/vote/' + postId, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({value: value})
+    }).then(response => response.json()).then(data => {
+        if (data.success) {
+            scoreEl.textContent = data.score;
+        }
+    }).catch(err => console.error('Vote error:', err));
+}
+
+function sharePost(postId) {
+    const url = window.location.origin + '/post/' + postId;
+    if (navigator.share) {
+        navigator.share({
+            title: 'Check this post!',
+            url: url
+        });
+    } else {
+        prompt('Copy this link to share:', url);
+    }
+}
+
+// New: search-as-you-type. Waits for a pause in typing; picking a suggestion (or Enter on one) opens it, while
+// typing text that happens to equal a suggestion does not.
+let suggestTimer = null;
+let suggestUrls = {};
+function openSuggestion(input) {
+    const url = suggestUrls[input.value];
+    if (url) {
+        window.location = url;
+    }
+    return Boolean(url);
+}
+
+function suggestKey(event) {
+    if (event.key === 'Enter' && openSuggestion(event.target)) {
+        event.preventDefault();  // Open the suggestion instead of submitting the search
+    }
+}
+
+function suggest(event) {
+    const input = event.target;
+    // A datalist pick arrives as an input event that is not typing (no InputEvent, or a replacement)
+    if (!(event instanceof InputEvent) || event.inputType === 'insertReplacementText') {
+        if (openSuggestion(input)) {
+            return;
+        }
+    }
+    clearTimeout(suggestTimer);
+    const q = input.value.trim();
+    if (q.length < 2) {
+        return;
+    }
+    suggestTimer = setTimeout(() => {
+        fetch('/search/suggest?q=' + encodeURIComponent(q)).then(response => response.json()).then(data => {
+            const list = document.getElementById('suggestions');
+            list.innerHTML = '';
+            suggestUrls = {};
+            data.suggestions.forEach(s => {
+                const option = document.createElement('option');
+                option.value = s.label;
+                option.label = s.type;
+                list.appendChild(option);
+                suggestUrls[s.label] = s.url;
+            });
+        }).catch(err => console.error('Suggest error:', err));
+    }, 150);
+}
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import and_, exists, func, insert, literal, select, update
+from models import db, User, Post, Comment, Notification, Subscription
+from auth import invalidate_session_user
+from tasks import tasks
+
+def is_subscribed(user_id, post_id):
+    return db.session.query(exists().where(Subscription.user_id == user_id, Subscription.post_id == post_id)).scalar()
+
+def subscribe(user_id, post_id):
+    """Subscribe user to post's comments unless already subscribed (caller commits)."""
+    if not is_subscribed(user_id, post_id):
+        db.session.add(Subscription(user_id=user_id, post_id=post_id))
+
+def unsubscribe(user_id, post_id):
+    Subscription.query.filter_by(user_id=user_id, post_id=post_id).delete(synchronize_session=False)
+
+def notify_subscribers(post_id, comment_id, actor_id):
+    """Fan a new comment out to post's subscribers (except its author) in two set-based statements.
+
+    A subscriber who still has an unread notification for this post from the last NOTIFY_COALESCE_SECONDS gets
+    that row bumped; everyone else gets one new row from a single INSERT ... SELECT. Returns the recipient ids;
+    caller commits.
+    """
+    actor = db.session.scalar(select(User.username).where(User.id == actor_id))
+    title = db.session.scalar(select(Post.title).where(Post.id == post_id))
+    message = f"New comment by {actor} on '{title}'"[:200]
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=current_app.config['NOTIFY_COALESCE_SECONDS'])
+    recipients = select(Subscription.user_id).where(Subscription.post_id == post_id, Subscription.user_id != actor_id)
+    recent = and_(Notification.post_id == post_id, Notification.is_read.is_(False), Notification.timestamp >= cutoff)
+
+    db.session.execute(update(Notification).where(recent, Notification.user_id.in_(recipients)).values(
+        comment_id=comment_id, message=message, timestamp=now, event_count=Notification.event_count + 1))
+    fresh = recipients.add_columns(literal(post_id), literal(comment_id), literal(message), literal(now),
+                                   literal(False), literal(1)).where(
+        ~exists().where(recent, Notification.user_id == Subscription.user_id))
+    db.session.execute(insert(Notification).from_select(
+        ['user_id', 'post_id', 'comment_id', 'message', 'timestamp', 'is_read', 'event_count'], fresh))
+    return db.session.scalars(recipients).all()
+
+def deliver_notifications(post_id, comment_id, actor_id):
+    """Background fan-out for threads too big to notify inside the comment request.
+
+    Clears the comment's notify_pending mark in the same transaction, so a fan-out that both its queued job and
+    the recovery sweep pick up is delivered once.
+    """
+    claimed = db.session.execute(update(Comment).where(Comment.id == comment_id, Comment.notify_pending.is_(True))
+                                 .values(notify_pending=False)).rowcount
+    if not claimed:
+        db.session.rollback()
+        return
+    recipients = notify_subscribers(post_id, comment_id, actor_id)
+    db.session.commit()
+    for user_id in recipients:
+        invalidate_session_user(user_id)  # Bell badge count changed
+
+def deliver_pending(older_than):
+    """Recovery sweep: deliver fan-outs queued over older_than seconds ago and never run.
+
+    The task queue lives in process memory, so jobs queued when a worker restarts or is redeployed are lost; the
+    notify_pending mark committed with the comment is what survives. Returns how many were delivered.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+    pending = db.session.execute(select(Comment.post_id, Comment.id, Comment.user_id).where(
+        Comment.notify_pending.is_(True), Comment.timestamp <= cutoff).order_by(Comment.id)).all()
+    for post_id, comment_id, actor_id in pending:
+        deliver_notifications(post_id, comment_id, actor_id)
+    return len(pending)
+
+def notify_comment(post_id, comment_id, actor_id):
+    """Subscribe the commenter and notify the thread: inline for small threads, on the worker past NOTIFY_INLINE_MAX.
+
+    Commits the caller's pending work (the new comment) in the same transaction as the inline fan-out.
+    """
+    subscribe(actor_id, post_id)
+    db.session.flush()
+    subscribers = db.session.scalar(select(func.count()).where(Subscription.post_id == post_id))
+    if subscribers > current_app.config['NOTIFY_INLINE_MAX']:
+        # Marked in the comment's own transaction: if the queued job is lost, a later sweep still delivers it
+        db.session.execute(update(Comment).where(Comment.id == comment_id).values(notify_pending=True))
+        db.session.commit()  # The worker must see the comment
+        app = current_app._get_current_object()
+        tasks.enqueue(app, deliver_notifications, post_id, comment_id, actor_id)
+        tasks.enqueue(app, deliver_pending, app.config['NOTIFY_RECOVER_SECONDS'])  # Jobs lost in earlier restarts
+        return
+    recipients = notify_subscribers(post_id, comment_id, actor_id)
+    db.session.commit()
+    for user_id in recipients:
+        invalidate_session_user(user_id)
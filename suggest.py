@@ -0,0 +1,134 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import select
+from models import db, User, Category, Post
+from tasks import tasks
+
+KINDS = ('category', 'user', 'post')  # Also the display order of suggestions
+
+def _keys(label):
+    """Every word-start suffix of label ('learn python fast', 'python fast', 'fast'), so any word can be typed first."""
+    words = label.lower().split()
+    return {' '.join(words[i:]) for i in range(min(len(words), current_app.config['SUGGEST_MAX_WORDS']))}
+
+class PrefixIndex:
+    """One sorted array of (key, label, ref) per kind, answering prefix queries with a bisect each, no DB access.
+
+    Built from the DB on the background worker, first when a process is first asked for suggestions, and updated
+    in place by this process's writes. Rows created by other workers are pulled in by id every
+    SUGGEST_REFRESH_SECONDS; rows they delete or hide only drop out when the whole index is rebuilt, every
+    SUGGEST_REBUILD_SECONDS. Requests never wait for either: they search the current index meanwhile.
+    """
+
+    def __init__(self):
+        self.entries = {kind: [] for kind in KINDS}
+        self.high_water = dict.fromkeys(KINDS, 0)
+        self.refreshed_at = None
+        self.rebuilt_at = None
+        self._lock = threading.Lock()
+        self._busy = False  # A refresh or rebuild is queued or running
+
+    def schedule(self, app, job):
+        """Queue job ('refresh' or 'rebuild') on the background worker, unless one is already on its way."""
+        with self._lock:
+            if self._busy:
+                return
+            self._busy = True
+        tasks.enqueue(app, self.run, job)
+
+    def run(self, job):
+        try:
+            getattr(self, job)()
+        finally:
+            self._busy = False
+
+    def add(self, kind, ref, label):
+        self.add_many([(kind, ref, label)])
+
+    def add_many(self, rows):
+        """Idempotent, so a refresh may safely see rows this process already added."""
+        new = {kind: [(key, label, ref) for k, ref, label in rows if k == kind for key in _keys(label)] for kind in KINDS}
+        with self._lock:
+            for kind, entries in self.entries.items():
+                if len(new[kind]) > 100:  # Bulk (the initial build): one sort beats thousands of list inserts
+                    self.entries[kind] = sorted(set(entries).union(new[kind]))
+                    continue
+                for entry in new[kind]:
+                    i = bisect_left(entries, entry)
+                    if i == len(entries) or entries[i] != entry:
+                        entries.insert(i, entry)
+
+    def remove(self, kind, ref, label):
+        with self._lock:
+            entries = self.entries[kind]
+            for key in _keys(label):
+                i = bisect_left(entries, (key, label, ref))
+                if i < len(entries) and entries[i] == (key, label, ref):
+                    del entries[i]
+
+    def search(self, prefix, limit):
+        """Up to limit (kind, label, ref) matches: categories first, then users, then posts."""
+        prefix = ' '.join(prefix.lower().split())
+        results = []
+        with self._lock:
+            for kind in KINDS:  # Per kind, so a flood of matching titles can't crowd out users and categories
+                entries, seen = self.entries[kind], set()
+                i = bisect_left(entries, (prefix,))
+                end = min(len(entries), i + limit * 10)  # Bounded scan: many titles share popular words
+                for key, label, ref in entries[i:end]:
+                    if not key.startswith(prefix) or len(results) == limit:
+                        break
+                    if ref not in seen:
+                        seen.add(ref)
+                        results.append((kind, label, ref))
+        return results
+
+    def rebuild(self):
+        """Replace the index with a fresh build, dropping rows other workers have deleted or hidden since."""
+        fresh = PrefixIndex()
+        fresh.refresh()
+        with self._lock:
+            self.entries, self.high_water = fresh.entries, fresh.high_water
+        self.refreshed_at = self.rebuilt_at = fresh.refreshed_at
+
+    def refresh(self):
+        """Add rows created since the last refresh (everything, the first time)."""
+        sources = {
+            'category': select(Category.id, Category.slug.label('ref'), Category.name.label('label')),
+            'user': select(User.id, User.username.label('ref'), User.username.label('label')),
+            'post': select(Post.id, Post.id.label('ref'), Post.title.label('label')).where(Post.hidden.is_(False)),
+        }
+        rows = []
+        for kind, q in sources.items():
+            model_id = q.selected_columns[0]
+            for row_id, ref, label in db.session.execute(q.where(model_id > self.high_water[kind]).order_by(model_id)):
+                rows.append((kind, ref, label))
+                self.high_water[kind] = row_id
+        self.add_many(rows)
+        self.refreshed_at = time.monotonic()
+
+def init_app(app):
+    app.extensions['suggest'] = PrefixIndex()
+
+def get_index():
+    """This process's index as it stands (empty until its first build is done), scheduling a build when due."""
+    app = current_app._get_current_object()
+    index, now = app.extensions['suggest'], time.monotonic()
+    if index.rebuilt_at is None or now - index.rebuilt_at > app.config['SUGGEST_REBUILD_SECONDS']:
+        index.schedule(app, 'rebuild')
+    elif now - index.refreshed_at > app.config['SUGGEST_REFRESH_SECONDS']:
+        index.schedule(app, 'refresh')
+    return index
+
+def added(kind, ref, label):
+    """Index a row written by this process right away (no-op until the index has been built)."""
+    index = current_app.extensions['suggest']
+    if index.refreshed_at is not None:
+        index.add(kind, ref, label)
+
+def removed(kind, ref, label):
+    index = current_app.extensions['suggest']
+    if index.refreshed_at is not None:
+        index.remove(kind, ref, label)
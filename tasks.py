@@ -0,0 +1,55 @@
+import queue
+import threading
+
+class TaskQueue:
+    """In-process background worker: runs callables off the request path, each in its own app context."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('TASKS_EAGER', False)
+        app.extensions['tasks'] = self
+
+    def enqueue(self, app, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs); call after committing, since eager mode runs it in the caller's session."""
+        if app.config['TASKS_EAGER']:  # Tests/CLI: run inline so results are deterministic
+            fn(*args, **kwargs)
+            return
+        self._ensure_worker()
+        self._queue.put((app, fn, args, kwargs))
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self):
+        """Block until every queued task has run."""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        if self.alive:
+            return
+        with self._lock:
+            if not self.alive:
+                self._thread = threading.Thread(target=self._work, name='task-worker', daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            app, fn, args, kwargs = self._queue.get()
+            try:
+                with app.app_context():  # Teardown removes the scoped DB session after each task
+                    fn(*args, **kwargs)
+            except Exception:
+                app.logger.exception(f'Background task {fn.__name__} failed')
+            finally:
+                self._queue.task_done()
+
+tasks = TaskQueue()
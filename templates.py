@@ -4,42 +4,63 @@ ADMIN_TEMPLATE = '''
 <head>
     <meta charset="UTF-8">
     <title>Admin Dashboard</title>
-    <style>
-        body { font-family: Arial; max-width: 800px; margin: 0 auto; padding: 20px; }
-        .flagged-item { border: 1px solid #ccc; margin: 10px 0; padding: 10px; border-radius: 4px; }
-        form { display: inline; margin: 5px; }
-        button { padding: 4px 8px; background: #dc3545; color: white; border: none; border-radius: 4px; cursor: pointer; }
-        .back-link { margin: 10px 0; }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
 </head>
-<body>
+<body class="admin">
     <h1>Admin Dashboard</h1>
     <a href="/" class="back-link">← Back to Feed</a>
-    
+    {% with messages = get_flashed_messages() %}
+      {% for message in messages %}
+        <div class="flash">{{ message }}</div>
+      {% endfor %}
+    {% endwith %}
+
+    <form method="POST" action="/admin/bulk">
+    <div class="bulk-actions">
+        With selected:
+        <button type="submit" name="action" value="dismiss" class="dismiss">Dismiss Flags</button>
+        <button type="submit" name="action" value="delete">Delete</button>
+    </div>
+
     <h2>Flagged Posts</h2>
-    {% for flag, post in flagged_posts %}
+    {% for item in flagged_posts %}
     <div class="flagged-item">
-        <h3>{{ post.title }}</h3>
-        <p>Flagged by {{ flag.user.username }}: {{ flag.reason }}</p>
-        <small>{{ flag.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
-        <form method="POST" action="/admin/delete/post/{{ post.id }}">
-            <button type="submit">Delete Post</button>
-        </form>
+        <label><input type="checkbox" name="post_ids" value="{{ item.target.id }}">
+        <span class="flag-count">{{ item.flag_count }}</span>
+        <strong>{{ item.target.title }}</strong> <small>by {{ item.target.user.username }}{% if item.target.hidden %} (auto-hidden){% endif %}</small></label>
+        <p class="reporters">
+        {% for flag in item.flags %}
+            {{ flag.user.username if flag.user else 'system' }}: {{ flag.reason }} <small>({{ flag.timestamp.strftime('%Y-%m-%d %H:%M') }})</small>{% if not loop.last %}<br>{% endif %}
+        {% endfor %}
+        {% if item.flag_count > item.flags|length %}<br>…and {{ item.flag_count - item.flags|length }} more{% endif %}
+        </p>
+        <button type="submit" formaction="/admin/delete/post/{{ item.target.id }}">Delete Post</button>
     </div>
     {% endfor %}
-    
+    {% if next_posts %}
+    <a class="next-page" href="?posts_after={{ next_posts }}{% if request.args.comments_after %}&comments_after={{ request.args.comments_after }}{% endif %}">More flagged posts →</a>
+    {% endif %}
+
     <h2>Flagged Comments</h2>
-    {% for flag, comment in flagged_comments %}
+    {% for item in flagged_comments %}
     <div class="flagged-item">
-        <p>{{ comment.text }}</p>
-        <p>Flagged by {{ flag.user.username }}: {{ flag.reason }}</p>
-        <small>{{ flag.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
-        <form method="POST" action="/admin/delete/comment/{{ comment.id }}">
-            <button type="submit">Delete Comment</button>
-        </form>
+        <label><input type="checkbox" name="comment_ids" value="{{ item.target.id }}">
+        <span class="flag-count">{{ item.flag_count }}</span>
+        {{ item.target.text }} <small>by {{ item.target.user.username }}{% if item.target.hidden %} (auto-hidden){% endif %}</small></label>
+        <p class="reporters">
+        {% for flag in item.flags %}
+            {{ flag.user.username if flag.user else 'system' }}: {{ flag.reason }} <small>({{ flag.timestamp.strftime('%Y-%m-%d %H:%M') }})</small>{% if not loop.last %}<br>{% endif %}
+        {% endfor %}
+        {% if item.flag_count > item.flags|length %}<br>…and {{ item.flag_count - item.flags|length }} more{% endif %}
+        </p>
+        <button type="submit" formaction="/admin/delete/comment/{{ item.target.id }}">Delete Comment</button>
     </div>
     {% endfor %}
-    
+    {% if next_comments %}
+    <a class="next-page" href="?comments_after={{ next_comments }}{% if request.args.posts_after %}&posts_after={{ request.args.posts_after }}{% endif %}">More flagged comments →</a>
+    {% endif %}
+    </form>
+
     {% if not flagged_posts and not flagged_comments %}
     <p>No flagged items yet.</p>
     {% endif %}
@@ -53,27 +74,20 @@ PROFILE_TEMPLATE = '''
 <head>
     <meta charset="UTF-8">
     <title>Profile - {{ user.username }}</title>
-    <style>
-        body { font-family: Arial; max-width: 800px; margin: 0 auto; padding: 20px; }
-        .bio { background: #f9f9f9; padding: 10px; border-radius: 4px; margin: 10px 0; }
-        .stats { background: #e7f3ff; padding: 10px; border-radius: 4px; }
-        .post { border: 1px solid #ccc; margin: 10px 0; padding: 10px; }
-        .vote-score { background: #4caf50; color: white; padding: 2px 6px; border-radius: 4px; font-weight: bold; margin-left: 10px; }
-        .vote-btn { padding: 4px 8px; margin: 0 2px; border: none; border-radius: 4px; cursor: pointer; }
-        .up-btn { background: #4caf50; color: white; }
-        .down-btn { background: #f44336; color: white; }
-        .comment { margin-left: 20px; padding: 5px; background: #f9f9f9; border-left: 3px solid #ccc; }
-        form { margin: 20px 0; }
-        input[type="text"], textarea, button { display: block; margin: 5px 0; padding: 8px; width: 100%; max-width: 400px; box-sizing: border-box; }
-        .back-link { margin: 10px 0; }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+    <script src="{{ asset_url('app.js') }}" defer></script>
 </head>
-<body>
+<body class="profile">
     <h1>Profile: {{ user.username }}</h1>
     <a href="/" class="back-link">← Back to Feed</a>
     <div class="stats">
-        <strong>Karma: {{ user.karma }}</strong> | Posts: {{ user.posts|length }} | Joined: {{ user.id }}  <!-- ID as placeholder for join date -->
+        <strong>Karma: {{ stats.karma }}</strong> | Posts: {{ stats.post_count }} | Comments: {{ stats.comment_count }} | Followers: {{ stats.follower_count }} | Joined: {{ stats.joined_at.strftime('%Y-%m-%d') }}
     </div>
+    {% if current_user.id != user.id %}
+    <form method="POST" action="/follow/user/{{ user.id }}">
+        <button type="submit">{% if following %}Unfollow{% else %}Follow{% endif %}</button>
+    </form>
+    {% endif %}
     {% if user.bio %}
     <div class="bio">{{ user.bio }}</div>
     {% endif %}
@@ -87,7 +101,7 @@ PROFILE_TEMPLATE = '''
     <h2>Posts by {{ user.username }}</h2>
     {% for post in posts %}
     <div class="post" id="post-{{ post.id }}">
-        <h3>{{ post.title }} <small>in <span class="category">{{ post.category.name }}</span></small></h3>
+        <h3>{{ post.title }} <small>in <span class="category">{{ post.category }}</span></small></h3>
         <span class="vote-score" id="score-{{ post.id }}">{{ post.score }}</span>
         <button type="button" class="vote-btn up-btn" onclick="vote(event, {{ post.id }}, 1)">↑</button>
         <button type="button" class="vote-btn down-btn" onclick="vote(event, {{ post.id }}, -1)">↓</button>
@@ -95,28 +109,12 @@ PROFILE_TEMPLATE = '''
         {% if post.image_path %}
         <img src="{{ post.image_path }}" alt="Post image">
         {% endif %}
-        {% for comment in post.comments %}
-        <div class="comment">{{ comment.text }} <small>by {{ comment.user.username }} - {{ comment.timestamp.strftime('%Y-%m-%d %H:%M') }}</small></div>
-        {% endfor %}
+        <p><a href="/post/{{ post.id }}">{{ post.comment_count }} comments →</a></p>
     </div>
     {% endfor %}
-    
-    <script>
-        function vote(event, postId, value) {
-            event.preventDefault();
-            event.stopPropagation();
-            const scoreEl = document.getElementById('score-' + postId);
-            fetch('/vote/' + postId, {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({value: value})
-            }).then(response => response.json()).then(data => {
-                if (data.success) {
-                    scoreEl.textContent = data.score;
-                }
-            }).catch(err => console.error('Vote error:', err));
-        }
-    </script>
+    {% if next_before %}
+    <a href="?before={{ next_before }}">Older posts →</a>
+    {% endif %}
 </body>
 </html>
 '''
@@ -127,19 +125,14 @@ NOTIFICATIONS_TEMPLATE = '''
 <head>
     <meta charset="UTF-8">
     <title>Notifications</title>
-    <style>
-        body { font-family: Arial; max-width: 800px; margin: 0 auto; padding: 20px; }
-        .notification { border: 1px solid #ccc; margin: 10px 0; padding: 10px; border-radius: 4px; }
-        .unread { background: #e7f3ff; }
-        .back-link { margin: 10px 0; }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
 </head>
-<body>
+<body class="notifications-page">
     <h1>Notifications</h1>
     <a href="/" class="back-link">← Back to Feed</a>
     {% for notif in notifications %}
     <div class="notification {% if not notif.is_read %}unread{% endif %}">
-        <p>{{ notif.message }}</p>
+        <p>{{ notif.message }}{% if notif.event_count > 1 %} <small>(+{{ notif.event_count - 1 }} more)</small>{% endif %}</p>
         <small>{{ notif.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
     </div>
     {% endfor %}
@@ -156,53 +149,65 @@ SINGLE_POST_TEMPLATE = '''
 <head>
     <meta charset="UTF-8">
     <title>{{ post.title }}</title>
-    <style>
-        body { font-family: Arial; max-width: 800px; margin: 0 auto; padding: 20px; }
-        .post { border: 1px solid #ccc; margin: 10px 0; padding: 10px; }
-        .vote-score { background: #4caf50; color: white; padding: 2px 6px; border-radius: 4px; font-weight: bold; margin-left: 10px; }
-        .vote-btn { padding: 4px 8px; margin: 0 2px; border: none; border-radius: 4px; cursor: pointer; }
-        .up-btn { background: #4caf50; color: white; }
-        .down-btn { background: #f44336; color: white; }
-        .comment { margin-left: 20px; padding: 5px; background: #f9f9f9; border-left: 3px solid #ccc; }
-        .back-link { margin: 10px 0; }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+    <script src="{{ asset_url('app.js') }}" defer></script>
 </head>
-<body>
+<body class="post-page">
     <h1>{{ post.title }}</h1>
     <a href="/" class="back-link">← Back to Feed</a>
     <div class="post">
         <h3>{{ post.title }} <small>by {{ post.user.username }} in {{ post.category.name }}</small></h3>
         <span class="vote-score" id="score-{{ post.id }}">{{ post.score }}</span>
+        {% if not archived %}
         <button type="button" class="vote-btn up-btn" onclick="vote(event, {{ post.id }}, 1)">↑</button>
         <button type="button" class="vote-btn down-btn" onclick="vote(event, {{ post.id }}, -1)">↓</button>
+        {% endif %}
         <small>{{ post.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
         {% if post.image_path %}
         <img src="{{ post.image_path }}" alt="Post image">
         {% endif %}
+        {% if archived %}
+        <p><em>Archived: this post is read-only.</em></p>
+        {% else %}
+        <form method="POST" action="/subscribe/{{ post.id }}" class="subscribe-form">
+            <button type="submit">{% if subscribed %}Unsubscribe{% else %}Subscribe{% endif %}</button>
+        </form>
         <form method="POST" action="/comment/{{ post.id }}">
             <textarea name="comment" placeholder="Add a comment..." rows="2"></textarea>
             <button type="submit">Comment</button>
         </form>
-        {% for comment in post.comments %}
-        <div class="comment">{{ comment.text }} <small>by {{ comment.user.username }} - {{ comment.timestamp.strftime('%Y-%m-%d %H:%M') }}</small></div>
+        {% endif %}
+        <p><strong>{{ post.comment_count }} comments</strong>{% if views %} · {{ views[0] }} views by ~{{ views[1] }} readers{% endif %}</p>
+        {% if root %}
+        <p><a href="/post/{{ post.id }}">← Back to all comments</a></p>
+        {% endif %}
+        {% for comment in comments %}
+        <div class="comment" id="comment-{{ comment.id }}" style="margin-left: {{ 20 + (comment.depth - base_depth) * 20 }}px">
+            {% if comment.hidden %}<em>[hidden pending review]</em>{% else %}{{ comment.text }}{% endif %}
+            <small>by <a href="/profile/{{ comment.user.username }}" class="username">{{ comment.user.username }}</a> - {{ comment.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
+            {% if not archived %}
+            <details class="reply">
+                <summary>Reply</summary>
+                <form method="POST" action="/comment/{{ post.id }}">
+                    <input type="hidden" name="parent_id" value="{{ comment.id }}">
+                    <textarea name="comment" placeholder="Write a reply..." rows="2"></textarea>
+                    <button type="submit">Reply</button>
+                </form>
+            </details>
+            <form method="POST" action="/flag/comment/{{ comment.id }}" class="flag-form">
+                <input type="text" name="reason" placeholder="Flag reason...">
+                <button type="submit">Flag</button>
+            </form>
+            {% endif %}
+            {% if comment.depth == max_depth and comment.reply_count %}
+            <a href="/post/{{ post.id }}/thread/{{ comment.id }}">Continue this thread ({{ comment.reply_count }} more replies) →</a>
+            {% endif %}
+        </div>
         {% endfor %}
+        {% if next_after %}
+        <a href="?after={{ next_after }}">Load more replies →</a>
+        {% endif %}
     </div>
-    <script>
-        function vote(event, postId, value) {
-            event.preventDefault();
-            event.stopPropagation();
-            const scoreEl = document.getElementById('score-' + postId);
-            fetch('/vote/' + postId, {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({value: value})
-            }).then(response => response.json()).then(data => {
-                if (data.success) {
-                    scoreEl.textContent = data.score;
-                }
-            }).catch(err => console.error('Vote error:', err));
-        }
-    </script>
 </body>
 </html>
 '''
@@ -213,40 +218,10 @@ INDEX_TEMPLATE = '''
 <head>
     <meta charset="UTF-8">
     <title>Simple Q&A Web App with Notifications</title>
-    <style>
-        body { font-family: Arial; max-width: 800px; margin: 0 auto; padding: 20px; }
-        .post { border: 1px solid #ccc; margin: 10px 0; padding: 10px; }
-        .post img { max-width: 100%; height: auto; margin: 10px 0; border-radius: 8px; }
-        .category { background: #e7f3ff; padding: 2px 6px; border-radius: 4px; font-size: 0.9em; }
-        .vote-score { background: #4caf50; color: white; padding: 2px 6px; border-radius: 4px; font-weight: bold; margin-left: 10px; }
-        .vote-btn { padding: 4px 8px; margin: 0 2px; border: none; border-radius: 4px; cursor: pointer; }
-        .up-btn { background: #4caf50; color: white; }
-        .down-btn { background: #f44336; color: white; }
-        .comment { margin-left: 20px; padding: 5px; background: #f9f9f9; border-left: 3px solid #ccc; }
-        form { margin: 20px 0; }
-        input[type="text"], input[type="email"], input[type="password"], textarea, button, select { display: block; margin: 5px 0; padding: 8px; width: 100%; max-width: 400px; box-sizing: border-box; }
-        input[type="file"] { max-width: 400px; }
-        .search-form { display: flex; max-width: 400px; margin: 20px 0; }
-        .search-form input[type="text"] { flex: 1; margin-right: 10px; }
-        .search-form select { flex: 1; margin-right: 10px; }
-        .search-form button { flex: 1; }
-        .share-btn { background: #1da1f2; color: white; border: none; padding: 5px 10px; cursor: pointer; border-radius: 4px; }
-        .share-btn:hover { background: #0d8bd9; }
-        .user-info { float: right; color: #666; }
-        .logout { background: #dc3545; color: white; border: none; padding: 5px 10px; cursor: pointer; border-radius: 4px; }
-        .flash { color: red; }
-        .cat-filter { margin: 10px 0; }
-        a.username { color: #1da1f2; text-decoration: none; }
-        a.username:hover { text-decoration: underline; }
-        .search-header { color: #666; font-style: italic; }
-        .bell { position: relative; cursor: pointer; margin-left: 10px; }
-        .bell-badge { position: absolute; top: -8px; right: -8px; background: #f44336; color: white; border-radius: 50%; padding: 2px 5px; font-size: 0.8em; }
-        .flag-form { display: inline; margin-left: 10px; }
-        .flag-form input { width: 120px; margin-right: 5px; }
-        .flag-form button { padding: 2px 6px; }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+    <script src="{{ asset_url('app.js') }}" defer></script>
 </head>
-<body>
+<body class="feed">
     <h1>Simple Q&A Board with Notifications</h1>
     <div class="user-info">Logged in as {{ current_user.username }} | <button class="logout" onclick="location.href='/logout'">Logout</button>
         <span class="bell" onclick="location.href='/notifications'" title="Notifications">
@@ -268,7 +243,8 @@ INDEX_TEMPLATE = '''
     {% endwith %}
     
     <form method="GET" action="/search" class="search-form">
-        <input type="text" name="q" placeholder="Search titles..." value="{{ query or '' }}">
+        <input type="text" name="q" placeholder="Search titles..." value="{{ query or '' }}" list="suggestions" autocomplete="off" oninput="suggest(event)" onkeydown="suggestKey(event)">
+        <datalist id="suggestions"></datalist>
         <select name="cat_id">
             <option value="">All Categories</option>
             {% for cat in categories %}
@@ -295,7 +271,12 @@ INDEX_TEMPLATE = '''
         {% for cat in categories %}
         <a href="/category/{{ cat.slug }}" style="margin: 0 5px; color: #1da1f2;">{{ cat.name }}</a>
         {% endfor %}
-        | <a href="/">All</a>
+        | <a href="/">All</a> | <a href="/home">Home (following)</a>
+        {% if cat_id and not query %}
+        <form method="POST" action="/follow/category/{{ cat_id }}" style="display: inline;">
+            <button type="submit">{% if following %}Unfollow{% else %}Follow{% endif %} {{ cat_name }}</button>
+        </form>
+        {% endif %}
     </div>
     
     {% if query %}
@@ -304,7 +285,7 @@ INDEX_TEMPLATE = '''
     
     {% for post in posts %}
     <div class="post" id="post-{{ post.id }}">
-        <h3>{{ post.title }} <small>by <a href="/profile/{{ post.user.username }}" class="username">{{ post.user.username }}</a> in <span class="category">{{ post.category.name }}</span></small></h3>
+        <h3>{{ post.title }} <small>by <a href="/profile/{{ post.author }}" class="username">{{ post.author }}</a> in <span class="category">{{ post.category }}</span></small></h3>
         <span class="vote-score" id="score-{{ post.id }}">{{ post.score }}</span>
         <button type="button" class="vote-btn up-btn" onclick="vote(event, {{ post.id }}, 1)">↑</button>
         <button type="button" class="vote-btn down-btn" onclick="vote(event, {{ post.id }}, -1)">↓</button>
@@ -322,49 +303,19 @@ INDEX_TEMPLATE = '''
             <textarea name="comment" placeholder="Add a comment..." rows="2"></textarea>
             <button type="submit">Comment</button>
         </form>
-        
-        {% for comment in post.comments %}
-        <div class="comment">{{ comment.text }} <small>by <a href="/profile/{{ comment.user.username }}" class="username">{{ comment.user.username }}</a> - {{ comment.timestamp.strftime('%Y-%m-%d %H:%M') }}</small>
-            <form method="POST" action="/flag/comment/{{ comment.id }}" class="flag-form">
-                <input type="text" name="reason" placeholder="Flag reason...">
-                <button type="submit">Flag</button>
-            </form>
-        </div>
-        {% endfor %}
+        <a href="/post/{{ post.id }}" class="comment-count">{{ post.comment_count }} comments</a>
     </div>
     {% endfor %}
     
     {% if query and posts|length == 0 %}
     <p>No results found for "{{ query }}". Try a different search!</p>
     {% endif %}
-    
-    <script>
-        function vote(event, postId, value) {
-            event.preventDefault();
-            event.stopPropagation();
-            const scoreEl = document.getElementById('score-' + postId);
-            fetch('/vote/' + postId, {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({value: value})
-            }).then(response => response.json()).then(data => {
-                if (data.success) {
-                    scoreEl.textContent = data.score;
-                }
-            }).catch(err => console.error('Vote error:', err));
-        }
-        function sharePost(postId) {
-            const url = window.location.origin + '/post/' + postId;
-            if (navigator.share) {
-                navigator.share({
-                    title: 'Check this post!',
-                    url: url
-                });
-            } else {
-                prompt('Copy this link to share:', url);
-            }
-        }
-    </script>
+    {% if home and not posts %}
+    <p>Your home feed is empty. Follow people from their profiles, or categories from the filter bar.</p>
+    {% endif %}
+    {% if next_before %}
+    <a href="?before={{ next_before }}">Older posts →</a>
+    {% endif %}
 </body>
 </html>
 '''
@@ -1,17 +1,23 @@
 import pytest
 import os
 from app import create_app
-from models import db, User
+from models import db, User, Category, Post
+from werkzeug.security import generate_password_hash
 from flask import session as flask_session
 from flask_login import login_user
 
+# Passed to create_app: the URI must be set before db.init_app builds the engines, never the instance DB
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    'WTF_CSRF_ENABLED': False,
+    'TASKS_EAGER': True,  # Background tasks run inline in tests
+}
+
 @pytest.fixture
 def app():
     os.environ['TESTING'] = '1'
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    app.config['WTF_CSRF_ENABLED'] = False
+    app = create_app(TEST_CONFIG)
 
     with app.app_context():
         db.create_all()
@@ -52,4 +58,36 @@ def login(app, client):
                 client.session = dict(flask_session)
         
         return user
-    return _login
\ No newline at end of file
+    return _login
+
+# Shared factories: each commits one row in its own app context and returns the new id
+@pytest.fixture
+def make_user(app):
+    def _make(username, password='pw', **fields):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com',
+                        password_hash=generate_password_hash(password), **fields)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return _make
+
+@pytest.fixture
+def make_category(app):
+    def _make(name):
+        with app.app_context():
+            category = Category(name=name, slug=name.lower().replace(' ', '-'))
+            db.session.add(category)
+            db.session.commit()
+            return category.id
+    return _make
+
+@pytest.fixture
+def make_post(app):
+    def _make(user_id, category_id, title='A post', **fields):
+        with app.app_context():
+            post = Post(title=title, user_id=user_id, category_id=category_id, **fields)
+            db.session.add(post)
+            db.session.commit()
+            return post.id
+    return _make
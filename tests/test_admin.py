@@ -0,0 +1,69 @@
+import pytest
+from models import db, User, Post, Comment, Flag, Notification
+
+@pytest.fixture
+def flagged_posts(app, make_user, make_category, make_post):
+    """Admin 'mod' (password 'modpass') and three posts; post i gets i+1 flags, so the most-flagged comes first."""
+    make_user('mod', 'modpass', is_admin=True)
+    reporters = [make_user(f'rep{i}') for i in range(3)]
+    cat = make_category('Mod Cat')
+    post_ids = [make_post(reporters[0], cat, f'Spam {i}') for i in range(3)]
+    with app.app_context():
+        for i, post_id in enumerate(post_ids):
+            db.session.add_all(Flag(user_id=reporter, post_id=post_id, reason='spam') for reporter in reporters[:i + 1])
+        db.session.commit()
+    return post_ids
+
+def test_admin_queue_groups_and_paginates(client, app, flagged_posts):
+    post_ids = flagged_posts
+    app.config['ADMIN_QUEUE_PAGE_SIZE'] = 2
+    client.post('/login', data={'username': 'mod', 'password': 'modpass'})
+
+    response = client.get('/admin')
+    assert response.status_code == 200
+    assert b'Spam 2' in response.data and b'Spam 1' in response.data
+    assert b'Spam 0' not in response.data
+    assert b'posts_after=2.' in response.data  # Keyset cursor: flag count + id of last row
+
+    response = client.get(f'/admin?posts_after=2.{post_ids[1]}')
+    assert b'Spam 0' in response.data
+    assert b'Spam 2' not in response.data
+
+def test_admin_queue_lists_only_newest_flags(client, app, flagged_posts):
+    post_ids = flagged_posts
+    app.config['ADMIN_FLAGS_PER_TARGET'] = 2
+    client.post('/login', data={'username': 'mod', 'password': 'modpass'})
+    with app.app_context():
+        from admin import _flag_queue
+        items, _ = _flag_queue(Post, Flag.post_id, None, 10)
+        assert [(item.flag_count, len(item.flags)) for item in items] == [(3, 2), (2, 2), (1, 1)]
+    assert b'and 1 more' in client.get('/admin').data
+
+def test_admin_bulk_delete_and_dismiss(client, app, flagged_posts):
+    post_ids = flagged_posts
+    with app.app_context():
+        author = db.session.query(User).filter_by(username='rep1').first()
+        comment = Comment(text='me too', user_id=author.id, post_id=post_ids[0])
+        db.session.add(comment)
+        db.session.commit()
+        db.session.add(Notification(user_id=author.id, post_id=post_ids[0], comment_id=comment.id, message='hi'))
+        db.session.commit()
+    client.post('/login', data={'username': 'mod', 'password': 'modpass'})
+
+    response = client.post('/admin/bulk', data={'action': 'delete', 'post_ids': post_ids[:2]})
+    assert response.status_code == 302
+    response = client.post('/admin/bulk', data={'action': 'dismiss', 'post_ids': [post_ids[2]]})
+    assert response.status_code == 302
+    with app.app_context():
+        assert [p.id for p in Post.query.all()] == [post_ids[2]]
+        assert Comment.query.count() == 0
+        assert Notification.query.count() == 0
+        assert Flag.query.count() == 0
+
+def test_admin_bulk_requires_admin(client, app, flagged_posts, make_user):
+    post_ids = flagged_posts
+    make_user('plain', 'plainpass')
+    client.post('/login', data={'username': 'plain', 'password': 'plainpass'})
+    client.post('/admin/bulk', data={'action': 'delete', 'post_ids': post_ids})
+    with app.app_context():
+        assert Post.query.count() == len(post_ids)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from models import (db, Post, Comment, Vote, Notification, Subscription, UserStats, Flag,
+                    ArchivedPost, ArchivedComment, ArchivedVote, ArchivedNotification)
+from archive import archive_posts, archive_notifications
+
+OLD = datetime.now(timezone.utc) - timedelta(days=400)
+
+@pytest.fixture
+def archive_world(app, make_user, make_category, make_post):
+    """An old quiet post with a comment, a vote and notifications, an old post with a fresh comment, a new post."""
+    users = [make_user(f'arch{i}') for i in range(2)]
+    cat = make_category('Archive')
+    old, active, new = (make_post(users[0], cat, t, timestamp=ts)
+                        for t, ts in (('Old post', OLD), ('Old but active', OLD), ('New post', None)))
+    with app.app_context():
+        comment = Comment(text='Old answer', user_id=users[1], post_id=old, timestamp=OLD)
+        db.session.add_all([comment, Comment(text='Fresh answer', user_id=users[1], post_id=active),
+                            Vote(user_id=users[1], post_id=old, value=1),
+                            Subscription(user_id=users[0], post_id=old)])
+        db.session.commit()
+        db.session.add(Notification(user_id=users[0], post_id=old, comment_id=comment.id, message='m',
+                                    timestamp=OLD, is_read=True))
+        db.session.commit()
+    return users, old, active, new
+
+def test_archive_moves_quiet_posts(app, archive_world):
+    (author, _), old, active, new = archive_world
+    with app.app_context():
+        karma = db.session.get(UserStats, author).karma
+        assert archive_posts(datetime.now(timezone.utc) - timedelta(days=365), batch_size=1) == 1
+        assert {p.id for p in Post.query} == {active, new}
+        assert db.session.get(ArchivedPost, old).score == 1
+        assert [c.text for c in ArchivedComment.query] == ['Old answer'] and ArchivedVote.query.count() == 1
+        assert Comment.query.count() == 1 and Vote.query.count() == 0 and Subscription.query.count() == 0
+        assert ArchivedNotification.query.count() == 1 and Notification.query.count() == 0
+        UserStats.recount([author])  # Archived rows still count
+        assert db.session.get(UserStats, author).karma == karma == 1
+
+def test_flagged_posts_stay_hot(app, archive_world):
+    (author, reader), old, _, _ = archive_world
+    with app.app_context():
+        db.session.add(Flag(user_id=reader, post_id=old, reason='spam'))
+        db.session.commit()
+        assert archive_posts(datetime.now(timezone.utc) - timedelta(days=365), batch_size=10) == 0
+
+def test_archive_read_notifications(app, archive_world):
+    (author, _), old, _, _ = archive_world
+    with app.app_context():
+        comment_id = Comment.query.first().id
+        db.session.add(Notification(user_id=author, post_id=old, comment_id=comment_id, message='unread', timestamp=OLD))
+        db.session.commit()
+        assert archive_notifications(datetime.now(timezone.utc) - timedelta(days=90), batch_size=10) == 1
+        assert [n.message for n in Notification.query] == ['unread']
+
+def test_archived_post_stays_readable(client, app, runner, archive_world):
+    _, old, _, _ = archive_world
+    assert 'Archived 1 posts and 0 notifications' in runner.invoke(args=['archive']).output
+    client.post('/login', data={'username': 'arch0', 'password': 'pw'})
+    page = client.get(f'/post/{old}').data
+    assert b'Old post' in page and b'Old answer' in page and b'read-only' in page and b'Add a comment' not in page
+
+def test_ids_are_not_reused_after_archiving(app, archive_world):
+    (author, reader), old, active, new = archive_world
+    with app.app_context():
+        db.session.execute(Post.__table__.delete().where(Post.id.in_([active, new])))  # old is now the highest id
+        db.session.commit()
+        archive_posts(datetime.now(timezone.utc) - timedelta(days=365), batch_size=10)
+        post = Post(title='After archiving', user_id=author, category_id=db.session.get(ArchivedPost, old).category_id)
+        db.session.add(post)
+        db.session.commit()
+        db.session.add(Vote(user_id=reader, post_id=post.id, value=1))
+        db.session.commit()
+        assert post.id > new and Vote.query.one().id > ArchivedVote.query.one().id
@@ -0,0 +1,78 @@
+import asyncio
+import io
+import json
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+from asgi import create_asgi_app
+from models import db, Post, Comment, Notification
+
+def _call(asgi_app, method, path, query=b'', headers=(), body=b''):
+    """Drive one ASGI HTTP request; returns (status, headers dict, body)."""
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'http_version': '1.1',
+             'headers': [(k.encode(), v.encode()) for k, v in headers], 'client': ('127.0.0.1', 5000)}
+    asyncio.run(asgi_app(scope, receive, send))
+    start, chunks = sent[0], [m.get('body', b'') for m in sent[1:] if m['type'] == 'http.response.body']
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, b''.join(chunks)
+
+@pytest.fixture
+def login_cookie(client, make_user, make_category):
+    """(user id, category id, Cookie header) for a logged-in user."""
+    user_id, cat_id = make_user('asyncer'), make_category('Async Cat')
+    client.post('/login', data={'username': 'asyncer', 'password': 'pw'})
+    return user_id, cat_id, ('Cookie', f"session={client.get_cookie('session').value}")
+
+def test_async_feed_updates(client, app, login_cookie):
+    user_id, cat_id, cookie = login_cookie
+    asgi_app = create_asgi_app(app)
+    assert _call(asgi_app, 'GET', '/async/feed/updates')[0] == 401
+
+    with app.app_context():
+        db.session.add(Post(title='Fresh post', user_id=user_id, category_id=cat_id))
+        db.session.commit()
+    status, _, body = _call(asgi_app, 'GET', '/async/feed/updates', b'since=0&wait=1', [cookie])
+    assert status == 200
+    assert [p['title'] for p in json.loads(body)['posts']] == ['Fresh post']
+
+def test_async_upload_writes_file_and_post(client, app, tmp_path, login_cookie):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    user_id, cat_id, cookie = login_cookie
+    boundary, body = encode_multipart({'title': 'With image', 'category_id': str(cat_id),
+                                       'image': FileStorage(io.BytesIO(b'fake-jpeg'), filename='pic.jpg')})
+    status, _, response = _call(create_asgi_app(app), 'POST', '/async/posts', body=body,
+                                headers=[cookie, ('Content-Type', f'multipart/form-data; boundary={boundary}')])
+    assert status == 201
+    image_path = json.loads(response)['image_path']
+    assert (tmp_path / image_path.rsplit('/', 1)[1]).read_bytes() == b'fake-jpeg'
+    with app.app_context():
+        assert Post.query.filter_by(title='With image').one().image_path == image_path
+
+def test_async_notifications_marks_read(client, app, login_cookie):
+    user_id, cat_id, cookie = login_cookie
+    with app.app_context():
+        post = Post(title='Mine', user_id=user_id, category_id=cat_id)
+        db.session.add(post)
+        db.session.commit()
+        comment = Comment(text='hi', user_id=user_id, post_id=post.id)
+        db.session.add(comment)
+        db.session.commit()
+        db.session.add(Notification(user_id=user_id, post_id=post.id, comment_id=comment.id, message='New comment'))
+        db.session.commit()
+    status, _, body = _call(create_asgi_app(app), 'POST', '/async/notifications', headers=[cookie])
+    payload = json.loads(body)
+    assert status == 200 and payload['emailed'] is False  # Sending is suppressed under TESTING
+    assert [n['is_read'] for n in payload['notifications']] == [False]
+    with app.app_context():
+        assert Notification.query.filter_by(is_read=False).count() == 0
+
+def test_other_routes_bridge_to_wsgi(app):
+    status, headers, _ = _call(create_asgi_app(app), 'GET', '/login')
+    assert status == 200 and headers['content-type'].startswith('text/html')
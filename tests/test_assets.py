@@ -0,0 +1,39 @@
+import gzip
+import os
+from assets import build_assets, minify_css
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'src')
+
+def test_minify_css():
+    assert minify_css('/* c */\n.a  b { color : red ;\n margin: 0; }\n') == '.a b{color:red;margin:0}'
+
+def test_build_assets_hashed_and_precompressed(tmp_path):
+    manifest = build_assets(SRC, str(tmp_path))
+    css = manifest['app.css']
+    assert css.startswith('app.') and css.endswith('.css') and len(css.split('.')[1]) == 12
+    data = (tmp_path / css).read_bytes()
+    assert gzip.decompress((tmp_path / (css + '.gz')).read_bytes()) == data
+    assert b'/*' not in data
+    assert build_assets(SRC, str(tmp_path)) == manifest  # Same content, same names
+
+def test_pages_link_assets_served_immutable(client):
+    client.post('/register', data={'username': 'styler', 'email': 'styler@example.com', 'password': 'pw'})
+    html = client.get('/').get_data(as_text=True)
+    assert '<style>' not in html
+    css_url = html.split('<link rel="stylesheet" href="', 1)[1].split('"', 1)[0]
+
+    plain = client.get(css_url)
+    assert plain.status_code == 200 and 'Content-Encoding' not in plain.headers
+    assert plain.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    gzipped = client.get(css_url, headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+
+def test_html_compressed_when_accepted(client):
+    client.post('/register', data={'username': 'zipper', 'email': 'zipper@example.com', 'password': 'pw'})
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'Logged in as zipper' in gzip.decompress(response.data)
+    plain = client.get('/')
+    assert 'Content-Encoding' not in plain.headers and 'Accept-Encoding' in plain.headers['Vary']
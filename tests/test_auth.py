@@ -0,0 +1,40 @@
+from models import db, User
+from auth import SessionUser, load_session_user
+from werkzeug.security import generate_password_hash
+
+def test_login_rehashes_when_method_changes(client, app):
+    with app.app_context():
+        db.session.add(User(username='legacy', email='legacy@example.com',
+                            password_hash=generate_password_hash('oldpass', method='pbkdf2:sha256:1000')))
+        db.session.commit()
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    response = client.post('/login', data={'username': 'legacy', 'password': 'oldpass'})
+    assert response.status_code == 302
+    with app.app_context():
+        user = db.session.query(User).filter_by(username='legacy').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+    client.get('/logout')
+    assert client.post('/login', data={'username': 'legacy', 'password': 'oldpass'}).status_code == 302
+
+def test_wrong_password_rejected(client, app):
+    client.post('/register', data={'username': 'alice', 'email': 'alice@example.com', 'password': 'right'})
+    client.get('/logout')
+    response = client.post('/login', data={'username': 'alice', 'password': 'wrong'})
+    assert response.status_code == 200  # Login form re-rendered, no redirect to the feed
+
+def test_session_user_cached(app):
+    with app.app_context():
+        user = User(username='cached', email='cached@example.com', password_hash='x', is_admin=True)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    with app.test_request_context():
+        loaded = load_session_user(user_id)
+        assert isinstance(loaded, SessionUser)
+        assert (loaded.username, loaded.is_admin, loaded.unread_notifications) == ('cached', True, 0)
+        # Served from the cache: renaming in the DB isn't seen until invalidation or TTL expiry
+        db.session.get(User, user_id).username = 'renamed'
+        db.session.commit()
+        assert load_session_user(user_id).username == 'cached'
+        app.extensions['session_users'].delete(user_id)
+        assert load_session_user(user_id).username == 'renamed'
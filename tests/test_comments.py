@@ -0,0 +1,102 @@
+import pytest
+from models import db, Post, Comment, repad_comment_paths
+from admin import _delete_comments
+
+@pytest.fixture
+def thread_post(make_user, make_category, make_post):
+    user_id = make_user('threader')
+    return user_id, make_post(user_id, make_category('Thread Cat'), 'Threaded post')
+
+def _chain(user_id, post_id, depth):
+    """A reply chain depth+1 comments long; returns the ids root-first."""
+    ids, parent_id = [], None
+    for i in range(depth + 1):
+        comment = Comment(text=f'level {i}', user_id=user_id, post_id=post_id, parent_id=parent_id)
+        db.session.add(comment)
+        db.session.commit()
+        ids.append(comment.id)
+        parent_id = comment.id
+    return ids
+
+def test_reply_paths_and_counters(app, thread_post):
+    user_id, post_id = thread_post
+    with app.app_context():
+        root, reply = _chain(user_id, post_id, 1)
+        sibling = Comment(text='sibling', user_id=user_id, post_id=post_id)
+        db.session.add(sibling)
+        db.session.commit()
+        root, reply = db.session.get(Comment, root), db.session.get(Comment, reply)
+        assert reply.path == f'{root.id:012d}.{reply.id:012d}' and reply.depth == 1
+        assert root.reply_count == 1
+        assert db.session.get(Post, post_id).comment_count == 3
+        # Depth-first order straight from the index
+        ordered = Comment.query.filter_by(post_id=post_id).order_by(Comment.path).all()
+        assert [c.text for c in ordered] == ['level 0', 'level 1', 'sibling']
+
+def test_deep_thread_collapses_and_paginates(client, app, thread_post):
+    user_id, post_id = thread_post
+    app.config['COMMENT_MAX_DEPTH'] = 2
+    app.config['COMMENT_PAGE_SIZE'] = 2
+    with app.app_context():
+        ids = _chain(user_id, post_id, 4)
+    client.post('/login', data={'username': 'threader', 'password': 'pw'})
+
+    page = client.get(f'/post/{post_id}').data
+    assert b'level 0' in page and b'level 1' in page and b'level 2' not in page
+    assert b'Load more replies' in page
+
+    with app.app_context():
+        after = db.session.get(Comment, ids[1]).path
+    page = client.get(f'/post/{post_id}?after={after}').data
+    assert b'level 2' in page and b'Continue this thread' in page and b'level 3' not in page
+
+    page = client.get(f'/post/{post_id}/thread/{ids[2]}').data
+    assert b'level 3' in page and b'level 1' not in page
+
+def test_reply_via_route_and_subtree_delete(client, app, thread_post):
+    user_id, post_id = thread_post
+    client.post('/login', data={'username': 'threader', 'password': 'pw'})
+    client.post(f'/comment/{post_id}', data={'comment': 'top'})
+    with app.app_context():
+        top_id = Comment.query.filter_by(text='top').one().id
+    response = client.post(f'/comment/{post_id}', data={'comment': 'child', 'parent_id': top_id})
+    assert response.headers['Location'].endswith(f'/post/{post_id}')
+    with app.app_context():
+        assert Comment.query.filter_by(text='child').one().parent_id == top_id
+        _delete_comments([top_id])
+        db.session.commit()
+        assert Comment.query.count() == 0
+        assert db.session.get(Post, post_id).comment_count == 0
+
+def test_reply_depth_is_capped(client, app, thread_post):
+    app.config['COMMENT_MAX_REPLY_DEPTH'] = 3
+    user_id, post_id = thread_post
+    with app.app_context():
+        ids = _chain(user_id, post_id, 3)  # Deepest comment is at the cap
+    client.post('/login', data={'username': 'threader', 'password': 'pw'})
+    client.post(f'/comment/{post_id}', data={'comment': 'too deep', 'parent_id': ids[-1]})
+    with app.app_context():
+        reply = Comment.query.filter_by(text='too deep').one()
+        assert reply.depth == 3 and reply.parent_id == ids[2]  # A sibling of the deepest comment
+
+def test_old_paths_are_repadded(app, thread_post):
+    user_id, post_id = thread_post
+    with app.app_context():
+        root, reply = _chain(user_id, post_id, 1)
+        db.session.execute(Comment.__table__.update().where(Comment.id == reply).values(path=f'{root:08d}.{reply:08d}'))
+        assert repad_comment_paths() == 1 and repad_comment_paths() == 0
+        assert db.session.get(Comment, reply).path == f'{root:012d}.{reply:012d}'
+
+def test_comment_needs_an_existing_post_and_matching_parent(client, app, thread_post):
+    user_id, post_id = thread_post
+    with app.app_context():
+        other = Post(title='Other post', user_id=user_id, category_id=db.session.get(Post, post_id).category_id)
+        db.session.add(other)
+        db.session.commit()
+        other_id, (root,) = other.id, _chain(user_id, post_id, 0)
+    client.post('/login', data={'username': 'threader', 'password': 'pw'})
+    assert client.post('/comment/9999', data={'comment': 'orphan'}).status_code == 404
+    assert client.post(f'/comment/{post_id}', data={'comment': 'x', 'parent_id': 9999}).status_code == 404
+    client.post(f'/comment/{other_id}', data={'comment': 'cross-post', 'parent_id': root})
+    with app.app_context():
+        assert Comment.query.filter(Comment.text.in_(['orphan', 'x', 'cross-post'])).count() == 0
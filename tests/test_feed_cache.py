@@ -0,0 +1,44 @@
+import pytest
+import feed_cache
+from cache import SqliteCache
+from models import db
+from routes import create_post
+from admin import _delete_posts
+
+@pytest.fixture
+def feeder(make_user, make_category):
+    return make_user('feeder'), [make_category('Cached A'), make_category('Cached B')]
+
+def test_first_page_ids_follow_writes(app, feeder):
+    app.config['FEED_PAGE_SIZE'] = 2
+    user_id, (a, b) = feeder
+    with app.test_request_context():
+        p1, p2 = (create_post(user_id, f'Cached {i}', a).id for i in range(2))
+        assert feed_cache.first_page_ids() == [p2, p1]
+        assert feed_cache.first_page_ids(b) == []
+        p3 = create_post(user_id, 'Cached in B', b).id  # Prepended without a query
+        cache = app.extensions['feed_cache']
+        assert cache.get('feed:all') == [p3, p2, p1] and cache.get(f'feed:{b}') == [p3]
+        _delete_posts([p2])
+        db.session.commit()
+        assert cache.get('feed:all') is None  # Full list lost an id: rebuilt on the next read
+        assert feed_cache.first_page_ids() == [p3, p1]
+
+def test_feed_pages_by_before(client, app, feeder):
+    app.config['FEED_PAGE_SIZE'] = 2
+    user_id, (a, _) = feeder
+    with app.test_request_context():
+        ids = [create_post(user_id, f'Paged entry {i}', a).id for i in range(3)]
+    client.post('/login', data={'username': 'feeder', 'password': 'pw'})
+    page = client.get('/').data
+    assert b'Paged entry 2' in page and b'Paged entry 0' not in page and f'?before={ids[1]}'.encode() in page
+    assert b'Paged entry 0' in client.get(f'/?before={ids[1]}').data
+
+def test_sqlite_backend_is_shared(app, tmp_path, feeder):
+    app.config['FEED_CACHE_STORAGE'] = f'sqlite:///{tmp_path / "feeds.db"}'
+    feed_cache.init_app(app)
+    user_id, (a, _) = feeder
+    with app.test_request_context():
+        feed_cache.first_page_ids()
+        post_id = create_post(user_id, 'Shared across workers', a).id
+    assert SqliteCache(str(tmp_path / 'feeds.db')).get('feed:all') == [post_id]
@@ -0,0 +1,29 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import create_app
+from config import Config
+from conftest import TEST_CONFIG
+
+def test_healthz_and_readyz(client):
+    assert client.get('/healthz').get_json() == {'status': 'ok'}
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['database'] == {'primary': 'ok'}
+
+def test_readyz_fails_on_task_backlog(client, app):
+    app.config['READY_MAX_PENDING_TASKS'] = -1
+    response = client.get('/readyz')
+    assert response.status_code == 503 and response.get_json()['status'] == 'unavailable'
+
+def test_create_app_has_no_side_effects(monkeypatch, tmp_path):
+    upload_dir = tmp_path / 'uploads'
+    monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(upload_dir))
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(Engine, 'before_cursor_execute', listener)
+    try:
+        app = create_app(TEST_CONFIG)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', listener)
+    assert statements == [] and not upload_dir.exists()
+    assert 'mail' not in app.extensions  # Flask-Mail waits for the first send
@@ -0,0 +1,82 @@
+import pytest
+from models import db, Post, Flag
+from tasks import tasks
+
+@pytest.fixture
+def spam_post(make_user, make_category, make_post):
+    """Builder: users flagger0..flaggerN-1 and a post by the first; returns the post id."""
+    def _build(n_users):
+        users = [make_user(f'flagger{i}') for i in range(n_users)]
+        return make_post(users[0], make_category('Flag Cat'), 'Buy cheap stuff')
+    return _build
+
+def test_duplicate_flag_rejected(client, app, spam_post):
+    post_id = spam_post(1)
+    client.post('/login', data={'username': 'flagger0', 'password': 'pw'})
+    client.post(f'/flag/post/{post_id}', data={'reason': 'spam'})
+    response = client.post(f'/flag/post/{post_id}', data={'reason': 'spam again'}, follow_redirects=True)
+    assert b'already flagged' in response.data
+    with app.app_context():
+        assert Flag.query.count() == 1
+        assert db.session.get(Post, post_id).flag_count == 1
+
+def test_threshold_hides_post_from_feed(client, app, spam_post):
+    app.config['FLAG_HIDE_THRESHOLD'] = 2
+    post_id = spam_post(2)
+    for i in range(2):
+        client.post('/login', data={'username': f'flagger{i}', 'password': 'pw'})
+        client.post(f'/flag/post/{post_id}', data={'reason': 'spam'})
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        assert post.flag_count == 2 and post.hidden
+    assert b'Buy cheap stuff' not in client.get('/').data
+
+def test_flag_counts_agree(app, spam_post):
+    from moderation import flag_target, review_target
+    from admin import _flag_queue
+    app.config['FLAG_HIDE_THRESHOLD'] = 3
+    post_id = spam_post(2)
+    with app.test_request_context():
+        flag_target('post', post_id, None, 'Near-duplicate of post #1')  # System flag
+        for user_id in (1, 2):
+            flag_target('post', post_id, user_id, 'spam')
+        review_target('post', post_id)  # Worker recount keeps the counter as it was
+        post = db.session.get(Post, post_id)
+        items, _ = _flag_queue(Post, Flag.post_id, None, 10)
+        assert post.flag_count == items[0].flag_count == Flag.query.count() == 3 and post.hidden
+
+def test_init_db_upgrades_a_pre_counter_database(app, runner, spam_post):
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from moderation import upgrade_schema
+    post_id = spam_post(3)
+    with app.app_context():  # Roll the schema back to before flag counters
+        for table in ('post', 'comment'):
+            db.session.execute(text(f'DROP INDEX ix_{table}_hidden'))
+            db.session.execute(text(f'ALTER TABLE {table} DROP COLUMN hidden'))
+            db.session.execute(text(f'ALTER TABLE {table} DROP COLUMN flag_count'))
+        db.session.execute(text('DROP TABLE flag'))
+        db.session.execute(text('CREATE TABLE flag (id INTEGER PRIMARY KEY, user_id INTEGER, post_id INTEGER, '
+                                'comment_id INTEGER, reason VARCHAR(200) NOT NULL, timestamp DATETIME)'))
+        db.session.execute(text("INSERT INTO flag (user_id, post_id, reason) VALUES "
+                                "(1, :p, 'a'), (1, :p, 'again'), (2, :p, 'b'), (3, :p, 'c')"), {'p': post_id})
+        db.session.commit()
+    app.config['FLAG_HIDE_THRESHOLD'] = 3
+    output = runner.invoke(args=['init-db']).output
+    assert 'flag: added unique_post_flag' in output and 'post: added flag_count and hidden' in output
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        assert (post.flag_count, post.hidden, Flag.query.count()) == (3, True, 3)  # Duplicate dropped
+        db.session.add(Flag(user_id=2, post_id=post_id, reason='twice'))
+        with pytest.raises(IntegrityError):
+            db.session.flush()
+        db.session.rollback()
+        assert upgrade_schema() == []
+
+def test_task_queue_runs_in_background(app):
+    app.config['TASKS_EAGER'] = False
+    results = []
+    tasks.enqueue(app, results.append, 'done')
+    tasks.join()
+    assert results == ['done']
+    assert tasks.alive
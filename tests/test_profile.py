@@ -0,0 +1,51 @@
+import pytest
+from models import db, Post, Comment, Vote, UserStats
+from admin import _delete_posts
+
+@pytest.fixture
+def writer_and_fan(make_user, make_category):
+    return make_user('writer'), make_user('fan'), make_category('Profile Cat')
+
+def test_stats_follow_writes(app, writer_and_fan):
+    author, fan, cat = writer_and_fan
+    with app.app_context():
+        post = Post(title='Counted', user_id=author, category_id=cat)
+        db.session.add(post)
+        db.session.commit()
+        db.session.add_all([Comment(text='hi', user_id=fan, post_id=post.id), Vote(user_id=fan, post_id=post.id, value=1)])
+        db.session.commit()
+        vote = Vote.query.filter_by(user_id=fan).one()
+        vote.value = -1
+        db.session.commit()
+        stats = db.session.get(UserStats, author)
+        assert (stats.post_count, stats.karma) == (1, -1)
+        assert db.session.get(UserStats, fan).comment_count == 1
+
+        _delete_posts([post.id])  # Bulk delete skips the events; recount keeps the rows right
+        db.session.commit()
+        db.session.expire_all()
+        assert (db.session.get(UserStats, author).post_count, db.session.get(UserStats, author).karma) == (0, 0)
+        assert db.session.get(UserStats, fan).comment_count == 0
+
+def test_profile_is_paginated(client, app, writer_and_fan):
+    author, _, cat = writer_and_fan
+    app.config['PROFILE_PAGE_SIZE'] = 2
+    with app.app_context():
+        db.session.add_all([Post(title=f'Entry {i}', user_id=author, category_id=cat) for i in range(3)])
+        db.session.commit()
+        oldest = Post.query.filter_by(title='Entry 0').one().id
+    client.post('/login', data={'username': 'writer', 'password': 'pw'})
+    page = client.get('/profile/writer').data
+    assert b'Posts: 3' in page and b'Entry 2' in page and b'Entry 0' not in page
+    assert f'?before={oldest + 1}'.encode() in page
+    assert b'Entry 0' in client.get(f'/profile/writer?before={oldest + 1}').data
+
+def test_missing_stats_row_is_rebuilt(client, app, writer_and_fan):
+    author, _, cat = writer_and_fan
+    with app.app_context():
+        db.session.add(Post(title='Legacy', user_id=author, category_id=cat))
+        db.session.commit()
+        UserStats.query.filter_by(user_id=author).delete()
+        db.session.commit()
+    client.post('/login', data={'username': 'writer', 'password': 'pw'})
+    assert b'Posts: 1' in client.get('/profile/writer').data
@@ -0,0 +1,54 @@
+from cache import MemoryCache, SqliteCache
+from models import db, User, Category, Post
+from ratelimit import parse_limit, take_token
+
+def test_parse_limit():
+    assert parse_limit('30/minute') == (30, 60)
+    assert parse_limit('5/hour') == (5, 3600)
+
+def test_token_bucket_refills(tmp_path):
+    for storage in (MemoryCache(), SqliteCache(str(tmp_path / 'limits.db'))):
+        assert take_token(storage, 'k', 2, 60, now=0) == 0
+        assert take_token(storage, 'k', 2, 60, now=0) == 0
+        assert take_token(storage, 'k', 2, 60, now=0) == 30  # One token refills every 30s
+        assert take_token(storage, 'k', 2, 60, now=30) == 0
+
+def test_register_throttled_before_db(client, app):
+    app.config['RATELIMITS'] = {'register': '2/hour'}
+    for i in range(2):
+        response = client.post('/register', data={'username': f'bot{i}', 'email': f'bot{i}@example.com', 'password': 'pw'})
+        assert response.status_code == 302
+        client.get('/logout')
+    response = client.post('/register', data={'username': 'bot2', 'email': 'bot2@example.com', 'password': 'pw'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+def test_vote_throttled_returns_json(client, app):
+    app.config['RATELIMITS'] = {'vote': '1/minute'}
+    client.post('/register', data={'username': 'voter', 'email': 'voter@example.com', 'password': 'pw'})
+    with app.app_context():
+        cat = Category(name='Vote Cat', slug='vote-cat')
+        db.session.add(cat)
+        db.session.commit()
+        post = Post(title='Vote me', user_id=db.session.query(User).filter_by(username='voter').one().id, category_id=cat.id)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    assert client.post(f'/vote/{post_id}', json={'value': 1}).status_code == 200
+    response = client.post(f'/vote/{post_id}', json={'value': 1})
+    assert response.status_code == 429
+    assert response.get_json() == {'success': False, 'error': 'Too many requests'}
+
+def test_anonymous_buckets_per_forwarded_client(monkeypatch):
+    from config import Config
+    from app import create_app
+    from conftest import TEST_CONFIG
+    monkeypatch.setattr(Config, 'TRUSTED_PROXY_HOPS', 1)
+    app = create_app({**TEST_CONFIG, 'RATELIMITS': {'login': '1/hour'}})
+    client = app.test_client()
+    proxy = {'REMOTE_ADDR': '10.0.0.1'}  # Every request arrives from the router
+    for addr in ('203.0.113.1', '203.0.113.2'):
+        response = client.post('/login', data={}, headers={'X-Forwarded-For': addr}, environ_base=proxy)
+        assert response.status_code != 429
+    assert client.post('/login', data={}, headers={'X-Forwarded-For': '203.0.113.1'},
+                       environ_base=proxy).status_code == 429
@@ -0,0 +1,20 @@
+from models import db, User, Category, Post, Vote
+from read_models import PostRow, post_rows
+
+def test_post_rows_carry_template_fields(app):
+    with app.app_context():
+        users = [User(username=f'reader{i}', email=f'reader{i}@example.com', password_hash='x') for i in range(3)]
+        cat = Category(name='Rows', slug='rows')
+        db.session.add_all(users + [cat])
+        db.session.commit()
+        shown = Post(title='Shown', user_id=users[0].id, category_id=cat.id)
+        hidden = Post(title='Hidden', user_id=users[0].id, category_id=cat.id, hidden=True)
+        db.session.add_all([shown, hidden])
+        db.session.commit()
+        db.session.add_all([Vote(user_id=users[1].id, post_id=shown.id, value=1),
+                            Vote(user_id=users[2].id, post_id=shown.id, value=1)])
+        db.session.commit()
+
+        rows = post_rows(Post.category_id == cat.id)
+        assert [type(r) for r in rows] == [PostRow]
+        assert (rows[0].title, rows[0].author, rows[0].category, rows[0].score) == ('Shown', 'reader0', 'Rows', 2)
@@ -0,0 +1,55 @@
+import time
+import pytest
+from app import create_app
+from conftest import TEST_CONFIG
+from config import Config
+from models import db, Post
+from replicas import STICKY_KEY
+
+@pytest.fixture
+def replica_app(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'DATABASE_REPLICA_URIS', [f'sqlite:///{tmp_path / "replica.db"}'])
+    app = create_app({**TEST_CONFIG, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}'})
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica0'])
+    yield app
+    db.metadatas.pop('replica0', None)  # db is module-global; later apps have no such bind
+
+def test_get_reads_from_replica_and_writes_use_primary(replica_app):
+    with replica_app.app_context():
+        primary, replica = db.engines[None], db.engines['replica0']
+    with replica_app.test_request_context('/', method='GET'):
+        assert db.session.get_bind(mapper=Post) is replica
+    with replica_app.test_request_context('/', method='POST'):
+        assert db.session.get_bind(mapper=Post) is primary
+
+def test_reads_stay_on_primary_after_a_write(replica_app):
+    with replica_app.test_request_context('/', method='GET'):
+        primary = db.engines[None]
+        db.session.execute(db.update(Post).where(Post.id == -1).values(title='x'))
+        assert db.session.get_bind(mapper=Post) is primary
+        response = replica_app.process_response(replica_app.make_response('ok'))
+        assert 'Set-Cookie' in response.headers  # Read-your-writes window for the next requests
+
+def test_sticky_session_reads_from_primary(replica_app):
+    from flask import session
+    with replica_app.test_request_context('/', method='GET'):
+        session[STICKY_KEY] = time.time() + 60
+        assert db.session.get_bind(mapper=Post) is db.engines[None]
+
+def test_sync_replicas_copies_primary(replica_app):
+    result = replica_app.test_cli_runner().invoke(args=['sync-replicas'])
+    assert 'replica0: synced from primary' in result.output
+
+def test_feed_cache_fills_from_primary(replica_app):
+    import feed_cache
+    from models import User, Category
+    with replica_app.app_context():
+        db.session.add_all([User(username='u', email='u@example.com', password_hash='x'), Category(name='C', slug='c')])
+        db.session.commit()
+        db.session.add(Post(title='Not replicated yet', user_id=1, category_id=1))
+        db.session.commit()
+    with replica_app.test_request_context('/', method='GET'):
+        assert db.session.get_bind(mapper=Post) is db.engines['replica0']  # The replica is still empty
+        assert feed_cache.first_page_ids() == [1]
@@ -43,4 +43,22 @@ def test_post_creation(client, app):
         'category_id': category_id
     }, follow_redirects=True)
     assert response.status_code == 200
-    assert b'Test Post' in response.data  # Verify post appears in index
\ No newline at end of file
+    assert b'Test Post' in response.data  # Verify post appears in index
+
+def test_feed_updates_returns_newer_posts(client, app):
+    client.post('/register', data={'username': 'poller', 'email': 'poller@example.com', 'password': 'pw'})
+    with app.app_context():
+        cat = Category(name='Poll Cat', slug='poll-cat')
+        db.session.add(cat)
+        db.session.commit()
+        category_id = cat.id
+    client.post('/', data={'title': 'Polled post', 'category_id': category_id})
+    posts = client.get('/feed/updates?since=0').get_json()['posts']
+    assert [p['title'] for p in posts] == ['Polled post']
+    assert client.get(f"/feed/updates?since={posts[0]['id']}").get_json() == {'posts': []}
+
+def test_longpoll_wait_is_clamped():
+    from routes import longpoll_wait
+    assert longpoll_wait('10', 3) == 3 and longpoll_wait('-5', 3) == 0 and longpoll_wait('1.5', 3) == 1.5
+    assert longpoll_wait('nan', 3) == 0 and longpoll_wait('inf', 3) == 0 and longpoll_wait('x', 3) == 0
+    assert longpoll_wait(None, 3) == 0
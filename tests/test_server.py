@@ -0,0 +1,23 @@
+import os
+import runpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _gunicorn_settings(monkeypatch, **env):
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+
+def test_gunicorn_settings_from_env(monkeypatch):
+    settings = _gunicorn_settings(monkeypatch, WEB_CONCURRENCY='3', WEB_THREADS='4', PORT='8000')
+    assert settings['workers'] == 3
+    assert settings['worker_class'] == 'gthread'
+    assert settings['bind'] == '0.0.0.0:8000'
+    assert settings['preload_app'] is True
+
+def test_single_threaded_workers_use_sync(monkeypatch):
+    assert _gunicorn_settings(monkeypatch, WEB_THREADS='1')['worker_class'] == 'sync'
+
+def test_seed_is_a_cli_command(runner):
+    result = runner.invoke(args=['seed'])
+    assert 'Seeding complete!' in result.output
@@ -0,0 +1,39 @@
+import time
+import pytest
+from models import db, Flag, Post
+from routes import create_post
+from similarity import simhash, find_duplicate
+
+@pytest.fixture
+def poster(make_user, make_category):
+    return make_user('poster'), make_category('Dup Cat')
+
+def test_near_duplicates_are_close_and_unrelated_texts_are_not(app):
+    with app.test_request_context():
+        a = simhash('Buy cheap watches online today at the best discount store')
+        b = simhash('Buy cheap watches online today at the best discount store!!')
+        c = simhash('How do I structure a large Flask application with blueprints')
+        assert (a ^ b).bit_count() <= 3 < (a ^ c).bit_count()
+        assert simhash('Thanks!') is None
+
+def test_duplicate_post_is_auto_flagged(app, poster):
+    user_id, cat_id = poster
+    with app.test_request_context():
+        first = create_post(user_id, 'Buy cheap watches online today at the best discount store', cat_id)
+        dup = create_post(user_id, 'BUY cheap watches online today at the best discount store', cat_id)
+        other = create_post(user_id, 'How do I structure a large Flask application', cat_id)
+        flag = Flag.query.filter_by(post_id=dup.id).one()
+        assert flag.user_id is None and f'#{first.id}' in flag.reason
+        assert Flag.query.filter_by(post_id=other.id).count() == 0
+
+def test_reject_mode_and_lookup_speed(app, poster):
+    user_id, cat_id = poster
+    app.config['DUPLICATE_ACTION'] = 'reject'
+    with app.test_request_context():
+        create_post(user_id, 'Limited offer click here for free crypto rewards', cat_id)
+        assert create_post(user_id, 'Limited offer: click here for free crypto rewards', cat_id) is None
+        assert Post.query.count() == 1
+        start = time.perf_counter()
+        for _ in range(100):
+            find_duplicate('post', 'An entirely different question about SQL indexes')
+        assert (time.perf_counter() - start) / 100 < 0.005  # Generous bound for slow CI machines
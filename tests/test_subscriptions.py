@@ -0,0 +1,83 @@
+import pytest
+from models import db, Post, Comment, Notification, Subscription
+from routes import create_post
+
+@pytest.fixture
+def thread(app, make_user, make_category):
+    """Builder: users (all with password 'pw') and a post by the first; returns (user ids, post id)."""
+    def _build(*names):
+        users = [make_user(n) for n in names]
+        cat = make_category('Sub Cat')
+        with app.app_context():
+            return users, create_post(users[0], 'Subscribed post', cat).id
+    return _build
+
+def _comment(client, name, post_id, text):
+    client.post('/login', data={'username': name, 'password': 'pw'})
+    client.post(f'/comment/{post_id}', data={'comment': text})
+    client.get('/logout')
+
+def test_commenters_are_subscribed_and_notified(client, app, thread):
+    (author, alice, bob), post_id = thread('author', 'alice', 'bob')
+    _comment(client, 'alice', post_id, 'first')
+    _comment(client, 'bob', post_id, 'second')
+    with app.app_context():
+        assert {s.user_id for s in Subscription.query.filter_by(post_id=post_id)} == {author, alice, bob}
+        assert Notification.query.filter_by(user_id=alice).count() == 1  # Bob's reply; never her own
+        assert Notification.query.filter_by(user_id=bob).count() == 0
+
+def test_notifications_coalesce_within_window(client, app, thread):
+    (author, alice), post_id = thread('author', 'alice')
+    for text in ('one', 'two', 'three'):
+        _comment(client, 'alice', post_id, text)
+    with app.app_context():
+        notif = Notification.query.filter_by(user_id=author).one()
+        assert notif.event_count == 3 and notif.message == "New comment by alice on 'Subscribed post'"
+        notif.is_read = True  # Once read, the next comment starts a fresh row
+        db.session.commit()
+    _comment(client, 'alice', post_id, 'four')
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=author).count() == 2
+
+def test_deleting_the_newest_comment_keeps_coalesced_notification(client, app, thread):
+    from admin import _delete_comments
+    (author, alice), post_id = thread('author', 'alice')
+    for text in ('one', 'two'):
+        _comment(client, 'alice', post_id, text)
+    with app.app_context():
+        one, two = (Comment.query.filter_by(text=t).one().id for t in ('one', 'two'))
+        _delete_comments([two])
+        db.session.commit()
+        assert Notification.query.filter_by(user_id=author).one().comment_id == one
+        _delete_comments([one])
+        db.session.commit()
+        assert Notification.query.filter_by(user_id=author).count() == 0  # Nothing left to point at
+
+def test_large_threads_fan_out_on_worker(client, app, thread):
+    app.config['NOTIFY_INLINE_MAX'] = 1
+    (author, alice), post_id = thread('author', 'alice')
+    _comment(client, 'alice', post_id, 'deferred')  # 2 subscribers > 1: delivered by the (eager) task queue
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=author).one().event_count == 1
+
+def test_lost_fan_out_is_recovered(client, app, monkeypatch, thread):
+    from subscriptions import deliver_pending
+    from tasks import tasks
+    app.config['NOTIFY_INLINE_MAX'] = 1
+    (author, alice), post_id = thread('author', 'alice')
+    monkeypatch.setattr(tasks, 'enqueue', lambda *args: None)  # The worker restarts before running the job
+    _comment(client, 'alice', post_id, 'lost')
+    monkeypatch.undo()
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=author).count() == 0
+        assert deliver_pending(0) == 1 and deliver_pending(0) == 0  # Delivered once
+        assert Notification.query.filter_by(user_id=author).count() == 1
+
+def test_unsubscribe_stops_notifications(client, app, thread):
+    (author, alice), post_id = thread('author', 'alice')
+    client.post('/login', data={'username': 'author', 'password': 'pw'})
+    client.post(f'/subscribe/{post_id}')
+    client.get('/logout')
+    _comment(client, 'alice', post_id, 'unheard')
+    with app.app_context():
+        assert Notification.query.filter_by(user_id=author).count() == 0
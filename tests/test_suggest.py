@@ -0,0 +1,71 @@
+import pytest
+import suggest
+from models import db, Post
+from routes import create_post
+from admin import _delete_posts
+
+@pytest.fixture
+def pythonista(make_user, make_category):
+    return make_user('pythonista'), make_category('Python Tips')
+
+def test_prefix_matches_across_kinds(app, pythonista):
+    user_id, cat_id = pythonista
+    with app.test_request_context():
+        create_post(user_id, 'Learning python the hard way', cat_id)
+        results = suggest.get_index().search('PYTH', 8)
+        kinds = [kind for kind, _, _ in results]
+        assert ('category', 'Python Tips', 'python-tips') in results
+        assert ('user', 'pythonista', 'pythonista') in results
+        assert any(kind == 'post' and label == 'Learning python the hard way' for kind, label, _ in results)
+        assert kinds == sorted(kinds, key=suggest.KINDS.index)  # Categories, then users, then posts
+        assert suggest.get_index().search('hard w', 8)[0][1] == 'Learning python the hard way'  # Any word can lead
+
+def test_index_follows_writes(app, pythonista):
+    user_id, cat_id = pythonista
+    with app.test_request_context():
+        index = suggest.get_index()
+        post_id = create_post(user_id, 'Zebra crossing etiquette', cat_id).id
+        assert index.search('zebra', 8) == [('post', 'Zebra crossing etiquette', post_id)]
+        _delete_posts([post_id])
+        db.session.commit()
+        assert index.search('zebra', 8) == [] and index.search('crossing', 8) == []
+
+def test_suggest_endpoint(client, app, pythonista):
+    pythonista
+    client.post('/login', data={'username': 'pythonista', 'password': 'pw'})
+    response = client.get('/search/suggest?q=pyth')
+    assert response.headers['Cache-Control'].startswith('private')
+    assert {'type': 'category', 'label': 'Python Tips', 'url': '/category/python-tips'} in response.json['suggestions']
+    assert client.get('/search/suggest?q=p').json['suggestions'] == []  # Below SUGGEST_MIN_CHARS
+
+def test_titles_do_not_crowd_out_users(app, pythonista):
+    user_id, cat_id = pythonista
+    with app.test_request_context():
+        for i in range(20):
+            create_post(user_id, f'Python question number {i} about decorators', cat_id)
+        kinds = [kind for kind, _, _ in suggest.get_index().search('pyth', 8)]
+        assert kinds[:2] == ['category', 'user'] and kinds.count('post') == 6
+
+def test_rebuild_drops_rows_changed_elsewhere(app, pythonista):
+    user_id, cat_id = pythonista
+    with app.test_request_context():
+        post_id = create_post(user_id, 'Yak shaving guide', cat_id).id
+        index = suggest.get_index()
+        assert index.search('yak', 8)
+        db.session.execute(Post.__table__.update().where(Post.id == post_id).values(hidden=True))  # Another worker
+        db.session.commit()
+        assert index.search('yak', 8)  # Refreshes only add rows
+        index.rebuilt_at -= app.config['SUGGEST_REBUILD_SECONDS'] + 1
+        assert suggest.get_index().search('yak', 8) == []
+
+def test_index_builds_on_the_worker(app, pythonista, monkeypatch):
+    from tasks import tasks
+    queued = []
+    monkeypatch.setattr(tasks, 'enqueue', lambda app, fn, *args: queued.append((fn, args)))
+    with app.test_request_context():
+        assert suggest.get_index().search('pyth', 8) == []  # Not built yet: the request doesn't wait for it
+        suggest.get_index()
+        assert len(queued) == 1  # One build in flight per process
+        fn, args = queued.pop()
+        fn(*args)
+        assert suggest.get_index().search('pyth', 8) and not queued
@@ -0,0 +1,48 @@
+import pytest
+from models import db, Post, TimelineEntry, UserStats
+from routes import create_post
+
+@pytest.fixture
+def world(make_user, make_category):
+    return [make_user(n) for n in ('reader', 'star', 'other')], [make_category('Followed'), make_category('Ignored')]
+
+def _titles(client, url='/home'):
+    page = client.get(url).data.decode()
+    return [t for t in ('by star', 'in followed', 'elsewhere', 'mine') if t in page]
+
+def test_follows_fan_out_into_home(client, app, world):
+    (reader, star, other), (followed, ignored) = world
+    client.post('/login', data={'username': 'reader', 'password': 'pw'})
+    client.post(f'/follow/user/{star}')
+    client.post(f'/follow/category/{followed}')
+    with app.test_request_context():
+        create_post(star, 'post by star', ignored)
+        create_post(other, 'post in followed', followed)
+        create_post(other, 'post elsewhere', ignored)
+        create_post(reader, 'post mine', ignored)
+        assert TimelineEntry.query.filter_by(user_id=reader).count() == 3
+    assert _titles(client) == ['by star', 'in followed', 'mine']
+
+    client.post(f'/follow/user/{star}')  # Unfollow removes star's posts
+    assert _titles(client) == ['in followed', 'mine']
+
+def test_popular_authors_are_merged_on_read(client, app, world):
+    app.config['FANOUT_MAX_FOLLOWERS'] = 0
+    (reader, star, other), (followed, ignored) = world
+    client.post('/login', data={'username': 'reader', 'password': 'pw'})
+    client.post(f'/follow/user/{star}')
+    with app.test_request_context():
+        assert db.session.get(UserStats, star).follower_count == 1
+        create_post(star, 'post by star', ignored)
+        assert TimelineEntry.query.filter_by(user_id=reader).count() == 0  # Not fanned out
+    assert _titles(client) == ['by star']
+
+def test_follow_backfills_and_home_paginates(client, app, world):
+    app.config['HOME_PAGE_SIZE'] = 2
+    (reader, star, other), (followed, ignored) = world
+    with app.test_request_context():
+        ids = [create_post(other, f'Backfilled {i}', followed).id for i in range(3)]
+    client.post('/login', data={'username': 'reader', 'password': 'pw'})
+    client.post(f'/follow/category/{followed}')
+    page = client.get('/home').data
+    assert b'Backfilled 2' in page and b'Backfilled 0' not in page and f'before={ids[1]}'.encode() in page
@@ -0,0 +1,60 @@
+import pytest
+import view_stats
+from models import db, Post, PostStats
+from read_models import post_rows
+
+@pytest.fixture
+def post_id(make_user, make_category, make_post):
+    user_id = make_user('viewer')
+    return make_post(user_id, make_category('Viewed'), 'Read me')
+
+def test_sketch_estimates_distinct_viewers():
+    registers = view_stats.new_sketch()
+    for viewer in range(20000):
+        view_stats.sketch_add(registers, viewer)
+        view_stats.sketch_add(registers, viewer)  # Repeat views don't count twice
+    assert abs(view_stats.estimate(registers) - 20000) < 20000 * 0.1
+    small = view_stats.new_sketch()
+    for viewer in range(50):
+        view_stats.sketch_add(small, viewer)
+    assert abs(view_stats.estimate(small) - 50) <= 2
+
+def test_views_buffer_until_flushed(app, post_id):
+    with app.test_request_context():
+        for viewer in [1, 2, 2, 3]:
+            view_stats.record_view(post_id, viewer)
+        assert db.session.get(PostStats, post_id) is None  # Nothing written yet
+        assert view_stats.post_counts(post_id) == (4, 3)
+        view_stats.flush()
+        view_stats.record_view(post_id, 4)
+        view_stats.flush()  # Second batch merges into the stored row
+        stats = db.session.get(PostStats, post_id)
+        assert (stats.view_count, stats.unique_viewers) == (5, 4)
+        assert post_rows(Post.id == post_id)[0].views == 5
+
+def test_flush_is_triggered_by_buffer_size(app, post_id):
+    app.config['VIEW_BUFFER_MAX_POSTS'] = 1
+    with app.test_request_context():
+        view_stats.record_view(post_id, 1)  # Buffer full: flushed through the (eager) task queue
+        view_stats.record_view(10 ** 6, 1)  # A post that doesn't exist (deleted since) is dropped
+        assert db.session.get(PostStats, post_id).view_count == 1
+        assert db.session.get(PostStats, 10 ** 6) is None
+
+def test_post_page_shows_views(client, app, post_id):
+    client.post('/login', data={'username': 'viewer', 'password': 'pw'})
+    client.get(f'/post/{post_id}')
+    assert b'2 views by ~1 readers' in client.get(f'/post/{post_id}').data
+
+def test_quiet_and_exiting_workers_flush(app, post_id):
+    with app.test_request_context():
+        view_stats.record_view(post_id, 1)
+        buffer = app.extensions['view_stats']
+        view_stats.flush_if_due(app)
+        assert db.session.get(PostStats, post_id) is None  # Not due yet
+        buffer.flushed_at -= app.config['VIEW_FLUSH_SECONDS']  # What the timer thread sees once a quiet period passes
+        view_stats.flush_if_due(app)
+        assert db.session.get(PostStats, post_id).view_count == 1
+        view_stats.record_view(post_id, 2)
+    view_stats.flush_on_exit(app)
+    with app.app_context():
+        assert db.session.get(PostStats, post_id).view_count == 2
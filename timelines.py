@@ -0,0 +1,96 @@
+from flask import current_app
+from sqlalchemy import exists, insert, literal, or_, select, union, update
+from models import db, Category, Follow, Post, TimelineEntry, UserStats
+from read_models import post_rows
+
+TARGETS = {'user': (Follow.followed_user_id, UserStats, UserStats.user_id, Post.user_id),
+           'category': (Follow.category_id, Category, Category.id, Post.category_id)}
+
+def is_following(follower_id, kind, target_id):
+    column = TARGETS[kind][0]
+    return db.session.query(exists().where(Follow.follower_id == follower_id, column == target_id)).scalar()
+
+def _bump_followers(kind, target_id, delta):
+    _, model, key, _ = TARGETS[kind]
+    db.session.execute(update(model).where(key == target_id).values(follower_count=model.follower_count + delta))
+
+def _followed_by(follower_id):
+    """Post filter: everything follower_id sees on their home feed (own posts plus followed users and categories)."""
+    return or_(Post.user_id == follower_id, *[
+        post_column.in_(select(column).where(Follow.follower_id == follower_id, column.isnot(None)))
+        for column, _, _, post_column in TARGETS.values()])
+
+def follow(follower_id, kind, target_id):
+    """Follow a user or category and backfill its recent posts into the follower's timeline (caller commits)."""
+    if is_following(follower_id, kind, target_id):
+        return
+    column, _, _, post_column = TARGETS[kind]
+    db.session.add(Follow(follower_id=follower_id, **{column.key: target_id}))
+    _bump_followers(kind, target_id, 1)
+    already = select(TimelineEntry.post_id).where(TimelineEntry.user_id == follower_id)
+    recent = (select(literal(follower_id), Post.id).where(post_column == target_id, Post.id.not_in(already))
+              .order_by(Post.id.desc()).limit(current_app.config['HOME_PAGE_SIZE']))
+    db.session.execute(insert(TimelineEntry).from_select(['user_id', 'post_id'], recent))
+
+def unfollow(follower_id, kind, target_id):
+    """Stop following and drop that source's posts unless another follow still covers them (caller commits)."""
+    column, _, _, post_column = TARGETS[kind]
+    deleted = Follow.query.filter(Follow.follower_id == follower_id, column == target_id).delete(synchronize_session=False)
+    if not deleted:
+        return
+    _bump_followers(kind, target_id, -1)
+    db.session.flush()  # _followed_by must no longer see the removed follow
+    orphaned = select(Post.id).where(post_column == target_id, ~_followed_by(follower_id))
+    TimelineEntry.query.filter(TimelineEntry.user_id == follower_id,
+                               TimelineEntry.post_id.in_(orphaned)).delete(synchronize_session=False)
+
+def fan_out_post(post_id):
+    """Background task: copy a new post into the timelines of its author and their/its category's followers.
+
+    Sources with more than FANOUT_MAX_FOLLOWERS followers are skipped here; home_timeline pulls their posts on
+    read instead, so one popular author never costs a write per follower.
+    """
+    post = db.session.get(Post, post_id)
+    if post is None:
+        return
+    limit = current_app.config['FANOUT_MAX_FOLLOWERS']
+    sources = []
+    if (db.session.scalar(select(UserStats.follower_count).where(UserStats.user_id == post.user_id)) or 0) <= limit:
+        sources.append(Follow.followed_user_id == post.user_id)
+    if db.session.scalar(select(Category.follower_count).where(Category.id == post.category_id)) <= limit:
+        sources.append(Follow.category_id == post.category_id)
+    readers = [select(literal(post.user_id).label('user_id'))]
+    if sources:
+        readers.append(select(Follow.follower_id).where(or_(*sources)))
+    reader = union(*readers).subquery().c.user_id  # UNION: one row per reader however many follows match
+    # A follow's backfill may have beaten this task to the post
+    rows = select(reader, literal(post_id)).where(
+        ~exists().where(TimelineEntry.user_id == reader, TimelineEntry.post_id == post_id))
+    db.session.execute(insert(TimelineEntry).from_select(['user_id', 'post_id'], rows))
+    db.session.commit()
+
+def home_timeline(user_id, before=None, limit=20):
+    """(posts, next_before) for user_id's home feed, newest first.
+
+    One range scan on the timeline's primary key, merged with the recent posts of any followed source that is
+    too popular for fan-out-on-write.
+    """
+    max_followers = current_app.config['FANOUT_MAX_FOLLOWERS']
+    q = select(TimelineEntry.post_id).where(TimelineEntry.user_id == user_id)
+    if before:
+        q = q.where(TimelineEntry.post_id < before)
+    ids = set(db.session.scalars(q.order_by(TimelineEntry.post_id.desc()).limit(limit)))
+
+    popular = []
+    for column, model, key, post_column in TARGETS.values():
+        followed = select(column).where(Follow.follower_id == user_id, column.isnot(None))
+        popular.append(post_column.in_(select(key).where(key.in_(followed), model.follower_count > max_followers)))
+    pulled = select(Post.id).where(or_(*popular))
+    if before:
+        pulled = pulled.where(Post.id < before)
+    ids.update(db.session.scalars(pulled.order_by(Post.id.desc()).limit(limit)))
+
+    ids = sorted(ids, reverse=True)[:limit]
+    next_before = ids[-1] if len(ids) == limit else None
+    posts = post_rows(Post.id.in_(ids), order_by=Post.id.desc()) if ids else []
+    return posts, next_before